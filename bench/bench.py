@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+#Nom :  : bench.py
+#Description    : Mesure des temps de génération des figures ma, typo et mf sur bases simulées
+#Copyright  : 2015, LIMAIR
+
+"""Banc de mesure des performances.
+
+    python bench/bench.py [--stations 10] [--annees 2013 2015] [--repetitions 3]
+
+Chaque type de figure est généré sur les bases simulées de faux.py (sans
+XAIR ni Météo-France) dans un dossier temporaire, étape par étape :
+    ma   : extraction (cache froid), extraction (cache chaud), agrégation
+           (moyenne glissante 8 h), légendes, tracé, sauvegarde ;
+    typo : extraction (cache froid), agrégats annuels (stock froid),
+           agrégats annuels (stock chaud), tracé, sauvegarde ;
+    mf   : extraction, rééchantillonnage horaire, calcul, tracé, sauvegarde.
+Le tracé construit la figure sans l'écrire, la sauvegarde comprend le
+rendu Agg et l'encodage. Chaque étape est répétée ; le médian et le
+minimum sont ajoutés (une ligne JSON par exécution) à --sortie (défaut
+build/bench/resultats.jsonl, non versionné) et comparés à l'exécution
+précédente de mêmes paramètres, ou à défaut à --reference : les étapes
+plus lentes que --seuil fois la référence sont signalées.
+
+bench/reference.jsonl (versionné) garde une exécution de référence par
+jeu de paramètres, mesurée sur une seule machine : à remplacer par une
+exécution sur la machine de production pour des comparaisons utiles.
+"""
+
+from __future__ import print_function
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RACINE)
+
+import numpy as np
+import pandas as pd
+
+from pyair_fig import agregats
+from pyair_fig import cache
+from pyair_fig import ma
+from pyair_fig import mf
+from pyair_fig import sortie
+from pyair_fig import stations
+from pyair_fig import style
+from pyair_fig import typo
+from pyair_fig.stock import StockAgregats
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from faux import FauxXAIR, FauxMeteoFrance
+
+SORTIE    = os.path.join(RACINE, 'build', 'bench', 'resultats.jsonl')
+REFERENCE = os.path.join(RACINE, 'bench', 'reference.jsonl')
+SEUIL  = 1.25   # étape signalée au-delà de SEUIL x la référence
+
+try:
+    chrono = time.perf_counter
+except AttributeError:
+    chrono = time.time
+
+
+class Mesures(object):
+    """Durées (s) et nombre de lignes de chaque étape, par répétition"""
+
+    def __init__(self):
+        self.durees = {}
+        self.lignes = {}
+
+    def mesure(self, etape, fonction, *args, **kwargs):
+        t0 = chrono()
+        res = fonction(*args, **kwargs)
+        self.durees.setdefault(etape, []).append(chrono() - t0)
+        if isinstance(res, pd.DataFrame):
+            self.lignes[etape] = int(res.shape[0] * res.shape[1])
+        return res
+
+    def resume(self):
+        return dict((etape, {'median': float(np.median(d)), 'min': float(np.min(d)),
+                             'lignes': self.lignes.get(etape)})
+                    for etape, d in self.durees.items())
+
+
+class Memoire(object):
+    """get_mesures servi par des DataFrame déjà extraits"""
+
+    def __init__(self, df):
+        self.df = df
+
+    def get_mesures(self, mes, debut=None, fin=None, freq='H', **kwargs):
+        return self.df
+
+
+class Capture(object):
+    """Remplace sortie.sauve pendant le tracé : les figures construites
+    sont gardées pour mesurer leur sauvegarde à part"""
+
+    def __enter__(self):
+        self.sauve   = sortie.sauve
+        self.figures = []
+        sortie.sauve = lambda fig, *args, **kwargs: self.figures.append((fig, args, kwargs))
+        return self
+
+    def __exit__(self, *exc):
+        sortie.sauve = self.sauve
+
+    def ecrit(self):
+        for fig, args, kwargs in self.figures:
+            self.sauve(fig, *args, **kwargs)
+
+
+def trace(m, module, *args):
+    """Tracé puis sauvegarde, mesurés séparément"""
+    with Capture() as capture:
+        m.mesure('trace', module.trace, *args)
+    m.mesure('sauvegarde', capture.ecrit)
+
+
+def bench_ma(m, xair, dossier, annee, sorties):
+    mesures = xair.mesures('O3')
+    debut, fin = '%i-01-01' % annee, '%i-12-31' % annee
+    s = ma.spec(polluants = [('O3', mesures)], debut = debut, fin = fin,
+                GLISSANT = True, sur = 8, Valeur_lim = True,
+                figname = 'bench-ma', SORTIES = sorties, FORCE = True)
+
+    xr = cache.CacheXAIR(xair, os.path.join(dossier, 'Cache'))
+    m.mesure('extraction', xr.get_mesures, mesures, debut=debut, fin=fin, freq='H')
+    df = m.mesure('extraction (cache)', xr.get_mesures, mesures, debut=debut, fin=fin, freq='H')
+    series = m.mesure('agregation', ma.calcule, s, Memoire(df))
+    m.lignes['agregation'] = int(sum(d.shape[0] * d.shape[1] for _, d in series))
+    index = stations.IndexMesures(xair, os.path.join(dossier, 'Cache', 'mesures.csv'))
+    labels = m.mesure('legendes', ma.libelles, series, index)
+    trace(m, ma, s, series, labels)
+
+
+def bench_typo(m, xair, dossier, annees, sorties):
+    s = typo.spec(polluant = 'PM10', histo = annees[0], ANNEE = annees[1],
+                  figname = 'bench-typo', SORTIES = sorties, FORCE = True)
+
+    xr = cache.CacheXAIR(xair, os.path.join(dossier, 'Cache'))
+    m.mesure('extraction', lambda: [xr.get_mesures(mes, debut=d, fin=f, freq=freq)
+                                    for mes, d, f, freq in typo.besoins(s)])
+    stock = StockAgregats(xr, os.path.join(dossier, 'Cache', 'agregats'))
+    m.mesure('agregats annuels', typo.calcule, s, stock)
+    courbes = m.mesure('agregats annuels (stock)', typo.calcule, s, stock)
+    trace(m, typo, s, courbes)
+
+
+def bench_mf(m, meteo, annee, sorties):
+    s = mf.spec(station = 'LIMOGES-BELLEGARDE', parametres = ['T', 'U', 'RR1'],
+                cumul_precip = True, debut = '%i-01-01' % annee, fin = '%i-12-31' % annee,
+                figname = 'bench-mf', SORTIES = sorties, FORCE = True)
+
+    brut = m.mesure('extraction', meteo.get_mesures, s['station'],
+                    parametres = s['parametres'], debut = s['debut'], fin = s['fin'])
+    donnees = mf.Donnees(meteo, [s])
+    donnees.extraits[s['station']] = m.mesure('reechantillonnage', brut.resample, 'H', how = 'mean')
+    df = m.mesure('calcul', mf.calcule, s, donnees)
+    trace(m, mf, s, df)
+
+
+def execute(args):
+    """Mesures de toutes les étapes : {'ma/extraction': {...}, ...}"""
+    xair = FauxXAIR(args.stations, args.lacunes)
+    meteo = FauxMeteoFrance(args.lacunes)
+    style.NOMS.update(xair.noms())
+    dossier_figures = style.DOSSIER
+
+    mesures = {'ma': Mesures(), 'typo': Mesures(), 'mf': Mesures()}
+    try:
+        for r in range(args.repetitions):
+            dossier = tempfile.mkdtemp(prefix='pyair_fig-bench-')
+            try:
+                style.DOSSIER = os.path.join(dossier, 'Figures') + os.sep
+                os.makedirs(style.DOSSIER)
+                if 'ma' in args.types:
+                    bench_ma(mesures['ma'], xair, dossier, args.annees[1], args.sorties)
+                if 'typo' in args.types:
+                    bench_typo(mesures['typo'], xair, dossier, args.annees, args.sorties)
+                if 'mf' in args.types:
+                    bench_mf(mesures['mf'], meteo, args.annees[1], args.sorties)
+            finally:
+                shutil.rmtree(dossier, ignore_errors=True)
+    finally:
+        style.DOSSIER = dossier_figures
+
+    res = {}
+    for t in args.types:
+        for etape, valeurs in mesures[t].resume().items():
+            res[t + '/' + etape] = valeurs
+    return res
+
+
+def version():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=RACINE,
+                                       stderr=subprocess.STDOUT).decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def reference(fichier, params):
+    """Dernière exécution enregistrée avec les mêmes paramètres"""
+    if not os.path.exists(fichier):
+        return None
+    ref = None
+    with open(fichier) as f:
+        for ligne in f:
+            if ligne.strip():
+                resultat = json.loads(ligne)
+                if resultat.get('params') == params:
+                    ref = resultat
+    return ref
+
+
+def compare(etapes, ref, seuil):
+    """Tableau des étapes (médian, référence) ; renvoie les étapes ralenties"""
+    lentes = []
+    print('%-40s %10s %10s %8s' % ('etape', 'median (s)', 'ref (s)', 'ratio'))
+    for etape in sorted(etapes):
+        median = etapes[etape]['median']
+        avant  = ref['etapes'].get(etape, {}).get('median') if ref else None
+        if avant:
+            ratio = median / avant
+            signal = '  <-- plus lent' if ratio > seuil else ''
+            if ratio > seuil:
+                lentes.append(etape)
+            print('%-40s %10.3f %10.3f %8.2f%s' % (etape, median, avant, ratio, signal))
+        else:
+            print('%-40s %10.3f %10s %8s' % (etape, median, '-', '-'))
+    return lentes
+
+
+def arguments():
+    parser = argparse.ArgumentParser(description="Temps de génération des figures sur bases simulées")
+    parser.add_argument('--stations', type=int, default=10, help="nombre de stations du parc simulé")
+    parser.add_argument('--annees', type=int, nargs=2, default=[2013, 2015], metavar=('DEBUT', 'FIN'),
+                        help="historique des figures typo ; ma et mf portent sur l'année FIN")
+    parser.add_argument('--lacunes', type=float, default=0.02, help="taux de valeurs manquantes isolées")
+    parser.add_argument('--repetitions', type=int, default=3)
+    parser.add_argument('--types', nargs='+', default=['ma', 'typo', 'mf'], choices=['ma', 'typo', 'mf'])
+    parser.add_argument('--sorties', nargs='+', default=['png'], choices=list(sortie.FORMATS))
+    parser.add_argument('--sortie', default=SORTIE, help="fichier des résultats (JSON, une ligne par exécution)")
+    parser.add_argument('--reference', default=REFERENCE,
+                        help="résultats de référence si --sortie n'a pas d'exécution de mêmes paramètres")
+    parser.add_argument('--seuil', type=float, default=SEUIL,
+                        help="ratio à la référence au-delà duquel une étape est signalée")
+    parser.add_argument('--strict', action='store_true',
+                        help="code de retour 1 si une étape est signalée")
+    return parser
+
+
+def main(argv=None):
+    args = arguments().parse_args(argv)
+    args.sorties = tuple(args.sorties)
+    params = {'stations': args.stations, 'annees': list(args.annees), 'lacunes': args.lacunes,
+              'types': sorted(args.types), 'sorties': list(args.sorties)}
+
+    etapes = execute(args)
+    ref = reference(args.sortie, params) or reference(args.reference, params)
+    lentes = compare(etapes, ref, args.seuil)
+
+    resultat = {'date': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'version': version(),
+                'python': platform.python_version(),
+                'pandas': pd.__version__,
+                'numpy': np.__version__,
+                'repetitions': args.repetitions,
+                'params': params,
+                'etapes': etapes}
+    dossier = os.path.dirname(args.sortie)
+    if dossier and not os.path.isdir(dossier):
+        os.makedirs(dossier)
+    with open(args.sortie, 'a') as f:
+        f.write(json.dumps(resultat, sort_keys=True) + '\n')
+    return 1 if lentes and args.strict else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
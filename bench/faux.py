@@ -0,0 +1,162 @@
+# -*- coding: UTF-8 -*-
+#Nom :  : faux.py
+#Description    : Bases XAIR et Météo-France simulées pour les mesures de performance
+#Copyright  : 2015, LIMAIR
+
+"""Bases simulées.
+
+FauxXAIR et FauxMeteoFrance ont les méthodes de xair.XAIR et
+meteo_france.METEO_FRANCE utilisées par pyair_fig (get_mesures,
+liste_mesures) et rendent des séries vraisemblables : niveau propre à
+chaque polluant, cycles journalier et saisonnier, bruit, valeurs
+manquantes isolées et pannes de plusieurs jours. Les valeurs d'une mesure
+ne dépendent que de son nom et de la date : deux extractions qui se
+recouvrent rendent les mêmes valeurs, comme la vraie base.
+"""
+
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from pyair_fig.cache import liste
+
+# Stations du parc (codes de style.NOMS) et suffixe de leurs mesures
+STATIONS = [('PRESID', 'PRE'), ('DALTON', 'DAL'), ('NICOLA', 'NIC'), ('HUGO', 'HUG'),
+            ('FONTAI', 'FON'), ('GARROS', 'GAR'), ('AINE', 'AIN'), ('VICTOR', 'VIC'),
+            ('IPAPER', 'IPA'), ('MERA', 'MER'), ('MADOUM', 'MAD')]
+
+# Polluant : (niveau moyen, amplitude journalière, amplitude saisonnière, pic journalier (h))
+POLLUANTS = {'O3'    : (60., 0.50, 0.40, 15),
+             'NO2'   : (25., 0.45, -0.30, 8),
+             'SO2'   : (3., 0.30, -0.20, 11),
+             'PM10'  : (20., 0.25, -0.25, 9),
+             'PM10C' : (20., 0.25, -0.25, 9),
+             'PM10NC': (16., 0.25, -0.25, 9),
+             'PM25'  : (12., 0.25, -0.30, 9),
+             'CO'    : (0.4, 0.40, -0.30, 8),
+             'TRS'   : (2., 0.20, 0.10, 6),
+             'H2S'   : (1., 0.20, 0.10, 6)}
+
+FAMILLES = ('O3', 'NO2', 'PM10', 'PM25', 'SO2')   # mesures de chaque station du parc
+
+
+def _graine(*cles):
+    return zlib.crc32(repr(cles).encode('utf-8')) & 0xffffffff
+
+
+def _parametres(mes):
+    return POLLUANTS.get(mes.split('_')[0], (20., 0.3, 0.2, 12))
+
+
+def _lacunes(valeurs, rs, lacunes, pas_par_jour):
+    """Valeurs manquantes isolées (taux lacunes) et pannes de 1 à 10 jours"""
+    n = len(valeurs)
+    valeurs[rs.random_sample(n) < lacunes] = np.nan
+    for _ in range(rs.poisson(2 * n / (365. * pas_par_jour))):
+        debut = rs.randint(n)
+        valeurs[debut:debut + rs.randint(1, 11) * pas_par_jour] = np.nan
+    return valeurs
+
+
+class FauxXAIR(object):
+    """Parc de stations mesures simulé ; stations : nombre de stations (les
+    codes au-delà de STATIONS sont BENCH01, BENCH02...), lacunes : taux de
+    valeurs manquantes isolées, latence : durée (s) simulée de chaque requête"""
+
+    def __init__(self, stations=10, lacunes=0.02, latence=0.):
+        self.lacunes  = lacunes
+        self.latence  = latence
+        self.requetes = 0
+        self.lignes   = 0
+        self.stations = STATIONS[:stations] + [('BENCH%02i' % i, 'B%02i' % i)
+                                               for i in range(1, stations - len(STATIONS) + 1)]
+        lignes = []
+        for station, suffixe in self.stations:
+            for famille in FAMILLES:
+                lignes.append((famille + '_' + suffixe, station,
+                               'OZONE' if famille == 'O3' else 'GENERAL'))
+        self.parc = pd.DataFrame(lignes, columns=['MESURE', 'STATION', 'RESEAU'])
+
+    def noms(self):
+        """Libellés des stations simulées absentes de style.NOMS"""
+        return dict((station, 'Station %s' % station) for station, _ in self.stations
+                    if station.startswith('BENCH'))
+
+    def mesures(self, famille):
+        """Mesures du parc pour une famille de polluant"""
+        return [m for m in self.parc['MESURE'] if m.split('_')[0] == famille]
+
+    def liste_mesures(self, reseau=None, **kwargs):
+        if self.latence:
+            time.sleep(self.latence)
+        if reseau is None:
+            return self.parc.copy()
+        return self.parc[self.parc['RESEAU'] == reseau].reset_index(drop=True)
+
+    def serie(self, mes, annee, freq='H'):
+        """Valeurs de la mesure mes sur l'année annee au pas freq"""
+        index = pd.date_range('%i-01-01' % annee, '%i-01-01' % (annee + 1), freq=freq, closed='left')
+        pas = pd.tseries.frequencies.to_offset(freq)
+        pas_par_jour = max(int(pd.Timedelta(days=1) / pd.Timedelta(pas.nanos)), 1) \
+            if isinstance(pas, pd.tseries.offsets.Tick) else 1
+
+        niveau, journalier, saisonnier, pic = _parametres(mes)
+        rs = np.random.RandomState(_graine(mes, annee, freq))
+        heures = np.asarray(index.hour) + np.asarray(index.minute) / 60.
+        jours  = np.asarray(index.dayofyear)
+        valeurs = niveau * (1 + journalier * np.cos(2 * np.pi * (heures - pic) / 24.)
+                              + saisonnier * np.cos(2 * np.pi * (jours - 172) / 365.))
+        # Bruit autocorrélé (épisodes de pollution de quelques jours)
+        n = len(index)
+        bruit = np.cumsum(rs.normal(0, 1, n))
+        sommes = np.r_[0., np.cumsum(bruit)]
+        fin, debut = np.arange(1, n + 1), np.maximum(np.arange(1, n + 1) - 10 * pas_par_jour, 0)
+        bruit -= (sommes[fin] - sommes[debut]) / (fin - debut)
+        valeurs *= np.exp(0.3 * bruit / max(np.std(bruit), 1e-9))
+        valeurs += rs.normal(0, 0.05 * niveau, n)
+        valeurs = _lacunes(np.maximum(valeurs, 0), rs, self.lacunes, pas_par_jour)
+        return pd.Series(valeurs, index=index, name=mes)
+
+    def get_mesures(self, mes, debut=None, fin=None, freq='H', **kwargs):
+        if self.latence:
+            time.sleep(self.latence)
+        mesures = liste(mes)
+        debut = pd.Timestamp(debut)
+        fin   = pd.Timestamp(fin) + pd.Timedelta(days=1)
+        df = pd.concat([pd.concat([self.serie(m, annee, freq)
+                                   for annee in range(debut.year, fin.year + 1)])
+                        for m in mesures], axis=1)
+        df = df[(df.index >= debut) & (df.index < fin)]
+        df.columns = mesures
+        self.requetes += 1
+        self.lignes   += len(df.index)
+        return df
+
+
+class FauxMeteoFrance(object):
+    """Stations Météo-France simulées : T, U et RR1 horaires, heures
+    manquantes absentes du résultat (comme la base)"""
+
+    def __init__(self, lacunes=0.02, latence=0.):
+        self.lacunes  = lacunes
+        self.latence  = latence
+        self.requetes = 0
+
+    def get_mesures(self, station, parametres=None, debut=None, fin=None):
+        if self.latence:
+            time.sleep(self.latence)
+        parametres = parametres or ['T', 'U', 'RR1']
+        index = pd.date_range(debut, pd.Timestamp(fin) + pd.Timedelta(hours=23), freq='H')
+        rs = np.random.RandomState(_graine(station, debut, fin))
+        heures, jours = np.asarray(index.hour), np.asarray(index.dayofyear)
+        t = (12 + 8 * np.cos(2 * np.pi * (jours - 200) / 365.)
+             + 5 * np.cos(2 * np.pi * (heures - 15) / 24.) + rs.normal(0, 1, len(index)))
+        pluie = np.where(rs.random_sample(len(index)) < 0.08, rs.exponential(1.5, len(index)), 0.)
+        colonnes = {'T'  : t,
+                    'U'  : np.clip(80 - 2.5 * (t - 12) + rs.normal(0, 5, len(index)), 5, 100),
+                    'RR1': np.round(pluie, 1)}
+        df = pd.DataFrame(dict((p, colonnes[p]) for p in parametres), index=index)
+        self.requetes += 1
+        return df[rs.random_sample(len(index)) >= self.lacunes]
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+#Nom :  : script-fig.py
+#Description    : Génération d'un lot de figures standardisées en une exécution
+#Copyright  : 2015, LIMAIR
+
+from pyair_fig import batch
+from pyair_fig import connexion
+from pyair_fig import extraction
+from pyair_fig import parallele
+from pyair_fig import stations
+
+# Connexions XAIR (ouvertes à la première requête hors cache), extractions
+# mises en cache dans ../Cache (HDF5)
+CONNEXIONS = 4    # Nombre max de connexions simultanées à XAIR
+xr = extraction.PoolXAIR(connexion.xair_cache, CONNEXIONS)
+index = stations.IndexMesures(xr)   # MESURE -> STATION, une requête pour tout le parc
+
+
+###################     Données d'entrées    ######################
+
+
+# Une figure par dict, mêmes paramètres que pyair_fig-ma.py (défauts : pyair_fig/ma.py)
+# Familles : 'NO2', 'O3', 'SO2', 'PM10', 'PM10NC', 'PM25', 'CO', 'TRS', 'H2S'
+# Chaque série n'est extraite qu'une fois pour l'ensemble du lot
+O3_RESEAU = index.liste(reseau='OZONE')
+
+FIGURES = [
+    dict(figname = 'O3juillet2015',
+         polluants = [('O3', O3_RESEAU)],
+         debut = '2015-07-01', fin = '2015-07-31',
+         GLISSANT = True, MAX_JOURNALIER = True, Valeur_lim = True),
+    dict(figname = 'O3juillet2015-horaire',
+         polluants = [('O3', O3_RESEAU)],
+         debut = '2015-07-01', fin = '2015-07-31',
+         ALERTE = True),
+    dict(figname = 'PM10juillet2015',
+         polluants = [('PM10', ('PM10_PRE','PM10_HUG','PM10_FON','PM10_NIC','PM10_GAR','PM10_DAL','PM10_AIN','PM10_IPA'))],
+         debut = '2015-07-01', fin = '2015-07-31',
+         frequence = 'D', Valeur_lim = True),
+    ]
+
+# Nombre de processus de rendu (1 : rendu séquentiel, None : un par cœur)
+PROCESSUS = 1
+
+
+##################          MAIN             ######################
+
+if PROCESSUS == 1:
+    batch.execute(FIGURES, xr, index)
+else:
+    parallele.execute(FIGURES, xr, index, PROCESSUS)
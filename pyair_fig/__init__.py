@@ -0,0 +1,4 @@
+# -*- coding: UTF-8 -*-
+#Nom :  : pyair_fig
+#Description    : Outils communs aux scripts de génération de figures
+#Copyright  : 2015, LIMAIR
@@ -0,0 +1,10 @@
+# -*- coding: UTF-8 -*-
+#Nom :  : __main__.py
+#Description    : python -m pyair_fig (voir cli.py)
+#Copyright  : 2015, LIMAIR
+
+import sys
+
+from pyair_fig import cli
+
+sys.exit(cli.main())
@@ -0,0 +1,142 @@
+# -*- coding: UTF-8 -*-
+#Nom :  : agregats.py
+#Description    : Agrégats réglementaires vectorisés (critère des 75 %)
+#Copyright  : 2015, LIMAIR
+
+"""Agrégats réglementaires.
+
+Les calculs portent directement sur le tableau NumPy (temps x stations) de
+toutes les mesures à la fois : moyenne glissante par sommes cumulées,
+moyennes/max par jour, mois ou année par réductions sur des blocs contigus.
+Chaque agrégat n'est valide que si au moins 75 % (valides) des valeurs
+attendues sont présentes ; le nombre de valeurs utilisées est rendu avec
+le résultat.
+"""
+
+import numpy as np
+import pandas as pd
+
+PERIODES_FIN = ('M', 'A')   # agrégats datés du dernier jour (comme resample)
+
+
+def minimum(valides, attendus):
+    """Nombre minimal de valeurs pour un agrégat valide"""
+    return np.ceil(valides * np.asarray(attendus, dtype=float) - 1e-9)
+
+
+def grille(df, freq):
+    """Valeurs (temps x stations) sur une grille régulière au pas freq"""
+    if len(df.index) == 0:
+        return np.empty((0, df.shape[1])), pd.DatetimeIndex([], freq=freq)
+    index = pd.date_range(df.index[0], df.index[-1], freq=freq)
+    return np.asarray(df.reindex(index).values, dtype=np.float64), index
+
+
+def glissante(valeurs, sur, valides=0.75):
+    """Moyenne glissante sur sur pas (fenêtre finissant au pas courant) ;
+    renvoie (moyennes, comptes)"""
+    n = valeurs.shape[0]
+    ok = ~np.isnan(valeurs)
+    sommes = np.zeros((n + 1,) + valeurs.shape[1:])
+    comptes = np.zeros((n + 1,) + valeurs.shape[1:], dtype=np.int64)
+    np.cumsum(np.where(ok, valeurs, 0.), axis=0, out=sommes[1:])
+    np.cumsum(ok, axis=0, out=comptes[1:])
+
+    debut = np.maximum(np.arange(1, n + 1) - sur, 0)
+    sommes  = sommes[1:] - sommes[debut]
+    comptes = comptes[1:] - comptes[debut]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        moyennes = sommes / comptes
+    moyennes[comptes < minimum(valides, sur)] = np.nan
+    return moyennes, comptes
+
+
+def periodes(index, regle):
+    """Découpage d'une grille régulière en périodes regle : position du
+    début de chaque période, dates des agrégats et nombre de pas attendus"""
+    periodes = index.to_period(regle)
+    ordinaux = periodes.asi8
+    debuts   = np.flatnonzero(np.r_[True, ordinaux[1:] != ordinaux[:-1]])
+    dates, attendus = bornes(periodes[debuts], regle, index.freq)
+    return debuts, dates, attendus
+
+
+def bornes(labels, regle, freq):
+    """Dates des agrégats des périodes labels (PeriodIndex) et nombre de pas
+    freq attendus dans chacune"""
+    debut_periode = labels.to_timestamp(how='s')
+    fin_periode   = (labels + 1).to_timestamp(how='s')
+    if isinstance(freq, pd.tseries.offsets.Tick):
+        attendus = (fin_periode.asi8 - debut_periode.asi8) // freq.nanos
+    else:
+        attendus = np.array([len(pd.date_range(d, f, freq=freq, closed='left'))
+                             for d, f in zip(debut_periode, fin_periode)])
+
+    if regle in PERIODES_FIN:
+        dates = fin_periode - pd.Timedelta(days=1)
+    else:
+        dates = debut_periode
+    return pd.DatetimeIndex(dates, freq=regle), attendus
+
+
+def par_periode(valeurs, index, regle, how='mean', valides=0.75):
+    """Moyenne (how='mean') ou max (how='max') par période regle ('H', 'D',
+    'M', 'A') ; index : grille régulière. Renvoie (valeurs, comptes, index)"""
+    debuts, dates, attendus = periodes(index, regle)
+
+    ok      = ~np.isnan(valeurs)
+    comptes = np.add.reduceat(ok.astype(np.int64), debuts, axis=0)
+    if how == 'mean':
+        with np.errstate(invalid='ignore', divide='ignore'):
+            res = np.add.reduceat(np.where(ok, valeurs, 0.), debuts, axis=0) / comptes
+    elif how == 'max':
+        res = np.fmax.reduceat(valeurs, debuts, axis=0)
+    else:
+        raise ValueError("how : 'mean' ou 'max'")
+
+    res[comptes < minimum(valides, attendus)[:, np.newaxis]] = np.nan
+    return res, comptes, dates
+
+
+def agrege(df, freq, frequence='H', sur=None, max_journalier=False, max_annuel=False,
+           valides=0.75):
+    """Chaîne des figures pyair_fig-ma : moyenne au pas frequence, moyenne
+    glissante sur sur pas, max journalier puis max annuel, avec le critère
+    des 75 % à chaque étape. freq : pas des données extraites.
+    Renvoie (valeurs, comptes) en DataFrame."""
+    valeurs, index = grille(df, freq)
+    comptes = (~np.isnan(valeurs)).astype(np.int64)
+
+    if frequence != freq and len(index):
+        valeurs, comptes, index = par_periode(valeurs, index, frequence, 'mean', valides)
+    if sur is not None:
+        valeurs, comptes = glissante(valeurs, sur, valides)
+    if max_journalier and len(index):
+        valeurs, comptes, index = par_periode(valeurs, index, 'D', 'max', valides)
+    if max_annuel and len(index):
+        valeurs, comptes, index = par_periode(valeurs, index, 'A', 'max', valides)
+
+    return (pd.DataFrame(valeurs, index=index, columns=df.columns),
+            pd.DataFrame(comptes, index=index, columns=df.columns))
+
+
+def par_groupe(valeurs, debuts, comptes=None, attendus=None, valides=None, pondere=False):
+    """Moyenne, min et max des colonnes de valeurs (périodes x stations)
+    par groupe de colonnes contiguës commençant aux positions debuts (une
+    typologie par groupe), en une réduction pour tous les groupes.
+    Avec valides (ex. 0.75), les agrégats d'une station calculés sur moins
+    de valides x attendus valeurs (comptes) sont écartés ; avec pondere,
+    la moyenne est pondérée par comptes. Renvoie (moyenne, mini, maxi),
+    tableaux périodes x groupes."""
+    ok = ~np.isnan(valeurs)
+    if valides is not None:
+        ok &= comptes >= minimum(valides, attendus)
+    poids = np.where(ok, comptes if pondere else 1., 0.)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        moyenne = (np.add.reduceat(np.where(ok, valeurs, 0.) * poids, debuts, axis=1)
+                   / np.add.reduceat(poids, debuts, axis=1))
+    valeurs = np.where(ok, valeurs, np.nan)
+    return (moyenne,
+            np.fmin.reduceat(valeurs, debuts, axis=1),
+            np.fmax.reduceat(valeurs, debuts, axis=1))
+
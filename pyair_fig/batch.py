@@ -0,0 +1,78 @@
+# -*- coding: UTF-8 -*-
+#Nom :  : batch.py
+#Description    : Génération d'un lot de figures en une seule exécution
+#Copyright  : 2015, LIMAIR
+
+"""Génération par lot.
+
+Les extractions de toutes les figures du lot sont regroupées par fréquence
+et par période (les périodes qui se chevauchent sont fusionnées) puis faites
+une seule fois ; chaque figure lit ensuite sa part dans les données
+partagées, via un objet Donnees qui se substitue à la connexion XAIR.
+"""
+
+from pyair_fig import chrono
+from pyair_fig import extraction
+from pyair_fig import ma
+from pyair_fig.cache import fusionne, jour, liste, JOUR, FORMAT
+
+
+class Donnees(object):
+    """Extractions partagées entre les figures d'un lot.
+
+    prepare() fait les extractions, get_mesures() (même signature que
+    xair.XAIR.get_mesures) sert ensuite les figures depuis la mémoire.
+    """
+
+    def __init__(self, xr):
+        self.xr      = xr
+        self.blocs   = {}   # freq -> [(debut, fin, DataFrame)]
+
+    def prepare(self, besoins):
+        """besoins : [(mesures, debut, fin, freq)]"""
+        plages = {}
+        for mesures, debut, fin, freq in besoins:
+            plages.setdefault(freq, []).append((jour(debut), jour(fin), mesures))
+
+        requetes = []
+        for freq, demandes in plages.items():
+            for d, f in fusionne([(d, f) for d, f, _ in demandes]):
+                mesures = []
+                for dd, ff, mes in demandes:
+                    if d <= dd and ff <= f:
+                        for m in liste(mes):
+                            if m not in mesures:
+                                mesures.append(m)
+                requetes.append((mesures, d.strftime(FORMAT), f.strftime(FORMAT), freq))
+
+        # Extractions simultanées si xr est un extraction.PoolXAIR
+        with chrono.etape('extraction', figure='lot') as e:
+            e.lignes = 0
+            for (mesures, d, f, freq), df in zip(requetes, extraction.extrait(self.xr, requetes)):
+                self.blocs.setdefault(freq, []).append((jour(d), jour(f), df))
+                e.lignes += len(df.index)
+
+    def get_mesures(self, mes, debut=None, fin=None, freq='H', **kwargs):
+        debut, fin = jour(debut), jour(fin)
+        for d, f, df in self.blocs.get(freq, []):
+            if d <= debut and fin <= f:
+                mesures = liste(mes)
+                if all(m in df.columns for m in mesures):
+                    return df.loc[(df.index >= debut) & (df.index < fin + JOUR), mesures]
+        # Extraction non préparée : accès direct
+        return self.xr.get_mesures(mes, debut=debut.strftime(FORMAT),
+                                   fin=fin.strftime(FORMAT), freq=freq, **kwargs)
+
+
+def execute(figures, xr, index):
+    """Génère toutes les figures (dicts de paramètres, voir ma.spec)
+    avec une seule extraction par série ; renvoie la liste des figures"""
+    specs = [ma.spec(**f) for f in figures]
+    donnees = Donnees(xr)
+    donnees.prepare([b for s in specs for b in ma.besoins(s)])
+    gabarits = {}   # figure stylée réutilisée pour chaque taille
+    try:
+        return [ma.figure(s, donnees, index, gabarits) for s in specs]
+    finally:
+        for g in gabarits.values():
+            g.ferme()
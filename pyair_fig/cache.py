@@ -0,0 +1,190 @@
+# -*- coding: UTF-8 -*-
+#Nom :  : cache.py
+#Description    : Cache local (HDF5) des mesures extraites de XAIR
+#Copyright  : 2015, LIMAIR
+
+"""Cache disque autour de xair.XAIR.get_mesures.
+
+Un fichier HDF5 par mesure et par fréquence (<dossier>/<freq>/<MESURE>.h5),
+une partition par année (clé 'a1999', 'a2000'...) et une table 'etat' qui
+garde pour chaque année la plage déjà extraite et la date d'extraction.
+Une année extraite après son 31/12 est close : elle n'est plus jamais
+redemandée à la base. L'année en cours est complétée à partir du dernier
+jour stocké.
+"""
+
+import os
+import datetime
+import threading
+
+import pandas as pd
+
+try:
+    basestring
+except NameError:
+    basestring = str
+
+FORMAT = '%Y-%m-%d'
+JOUR   = pd.Timedelta(days=1)
+
+# HDF5 n'est pas sûr entre threads : accès aux fichiers du cache sérialisés,
+# les requêtes à la base restent simultanées (extraction.PoolXAIR)
+VERROU = threading.RLock()
+
+
+def jour(date):
+    """Timestamp arrondi au jour"""
+    return pd.Timestamp(date).normalize()
+
+
+def _bornes(annee):
+    return pd.Timestamp('%i-01-01' % annee), pd.Timestamp('%i-12-31' % annee)
+
+
+def fusionne(plages):
+    """Fusionne les plages [(debut, fin)] contiguës (au jour près)"""
+    res = []
+    for d, f in sorted(plages):
+        if res and d <= res[-1][1] + JOUR:
+            res[-1] = (res[-1][0], max(f, res[-1][1]))
+        else:
+            res.append((d, f))
+    return res
+
+
+def liste(mes):
+    """Mesure(s) demandée(s) à get_mesures sous forme de liste"""
+    if isinstance(mes, basestring):
+        return [mes]
+    return list(mes)
+
+
+def _vide(nom):
+    return pd.Series([], index=pd.DatetimeIndex([]), name=nom, dtype=float)
+
+
+class CacheXAIR(object):
+    """Enveloppe de xair.XAIR dont get_mesures passe par le cache local.
+
+    Les autres méthodes (liste_mesures, liste_stations...) sont transmises
+    telles quelles à la connexion XAIR.
+    """
+
+    def __init__(self, xr, dossier='../Cache'):
+        self.xr      = xr
+        self.dossier = dossier
+
+    def __getattr__(self, attr):
+        return getattr(self.xr, attr)
+
+    def get_mesures(self, mes, debut=None, fin=None, freq='H', **kwargs):
+        # Requêtes non prévues par le cache (brut, format...) : accès direct
+        if debut is None or kwargs:
+            return self.xr.get_mesures(mes, debut=debut, fin=fin, freq=freq, **kwargs)
+
+        mesures    = liste(mes)
+        debut      = jour(debut)
+        fin        = jour(fin if fin is not None else datetime.date.today())
+        maintenant = pd.Timestamp(datetime.datetime.now())
+
+        # Plages manquantes, regroupées pour une requête par plage
+        requetes = {}
+        with VERROU:
+            for m in mesures:
+                for plage in self._manquants(m, freq, debut, fin):
+                    requetes.setdefault(plage, []).append(m)
+
+        for (d, f), groupe in sorted(requetes.items()):
+            df = self.xr.get_mesures(groupe,
+                                     debut = d.strftime(FORMAT),
+                                     fin   = f.strftime(FORMAT),
+                                     freq  = freq)
+            with VERROU:
+                for m in groupe:
+                    serie = df[m] if m in df.columns else _vide(m)
+                    self._ecrit(m, freq, serie, d, f, maintenant)
+
+        with VERROU:
+            return pd.concat([self._lit(m, freq, debut, fin) for m in mesures], axis=1)
+
+    def fichier(self, mes, freq):
+        return os.path.join(self.dossier, freq, '%s.h5' % mes)
+
+    def _store(self, mes, freq):
+        chemin = self.fichier(mes, freq)
+        if not os.path.isdir(os.path.dirname(chemin)):
+            os.makedirs(os.path.dirname(chemin))
+        return pd.HDFStore(chemin)
+
+    @staticmethod
+    def _etat(store):
+        if 'etat' in store:
+            return store['etat']
+        return pd.DataFrame(columns=['debut', 'fin', 'extraction'])
+
+    def _manquants(self, mes, freq, debut, fin):
+        """Plages [(debut, fin)] absentes du cache pour la mesure"""
+        chemin = self.fichier(mes, freq)
+        etat   = None
+        if os.path.exists(chemin):
+            store = pd.HDFStore(chemin)
+            try:
+                etat = self._etat(store)
+            finally:
+                store.close()
+        plages = []
+        for annee in range(debut.year, fin.year + 1):
+            jan, dec = _bornes(annee)
+            d, f = max(debut, jan), min(fin, dec)
+            if etat is None or annee not in etat.index:
+                plages.append((d, f))
+                continue
+            cd, cf, extraction = etat.loc[annee, ['debut', 'fin', 'extraction']]
+            close = extraction > dec + JOUR
+            if d < cd:
+                plages.append((d, cd - JOUR))
+            if f > cf:
+                # dernier jour stocké d'une année ouverte : potentiellement incomplet
+                plages.append((cf if not close else cf + JOUR, f))
+            elif not close and f == cf:
+                plages.append((cf, f))
+        return fusionne(plages)
+
+    def _ecrit(self, mes, freq, serie, debut, fin, maintenant):
+        """Fusionne la série extraite sur [debut, fin] dans les partitions"""
+        serie = serie.copy()
+        serie.name = mes
+        store = self._store(mes, freq)
+        try:
+            etat = self._etat(store)
+            for annee in range(debut.year, fin.year + 1):
+                jan, dec = _bornes(annee)
+                d, f = max(debut, jan), min(fin, dec)
+                nouveau = serie[(serie.index >= d) & (serie.index < f + JOUR)]
+                cle = 'a%i' % annee
+                if cle in store:
+                    ancien  = store[cle]
+                    nouveau = pd.concat([ancien[ancien.index < d],
+                                         nouveau,
+                                         ancien[ancien.index >= f + JOUR]])
+                store.put(cle, nouveau)
+                if annee in etat.index:
+                    d = min(d, etat.loc[annee, 'debut'])
+                    f = max(f, etat.loc[annee, 'fin'])
+                etat.loc[annee] = [d, f, maintenant]
+            store.put('etat', etat)
+        finally:
+            store.close()
+
+    def _lit(self, mes, freq, debut, fin):
+        store = pd.HDFStore(self.fichier(mes, freq))
+        try:
+            parts = [store['a%i' % annee] for annee in range(debut.year, fin.year + 1)
+                     if 'a%i' % annee in store]
+        finally:
+            store.close()
+        if not parts:
+            return _vide(mes)
+        serie = pd.concat(parts)
+        serie.name = mes
+        return serie[(serie.index >= debut) & (serie.index < fin + JOUR)]
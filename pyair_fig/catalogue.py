@@ -0,0 +1,143 @@
+# -*- coding: UTF-8 -*-
+#Nom :  : catalogue.py
+#Description    : Catalogue des mesures : station, polluant, typologie, début d'historique, PM10 non corrigé
+#Copyright  : 2015, LIMAIR
+
+"""Catalogue des mesures des figures par typologie.
+
+Les définitions de typo.py (listes de mesures par polluant et typologie,
+Typo, Polluant, Historique_*, PMNC) sont réunies une fois dans une table
+indexée par mesure :
+    MESURE, STATION, POLLUANT, TYPO, HISTO, PMNC
+(HISTO vide : paramètre histo de la figure ; PMNC : mesure PM10 non
+corrigée de même rang pour l'historique avant typo.HISTO). Les recherches
+(groupes d'un polluant, mesure non corrigée) sont des accès à un dict au
+lieu de parcourir les listes de chaque typologie. charge() construit le
+catalogue au premier appel et le partage entre toutes les figures de
+l'exécution.
+
+Paramètre catalogue d'une figure typo (chemin d'un fichier CSV) : le
+catalogue est lu dans ce fichier s'il existe, sinon construit depuis
+typo.py puis écrit dans ce fichier. Ajouter une station ou changer sa
+typologie revient alors à modifier une ligne du CSV (les listes de typo.py
+ne sont plus lues tant que le fichier existe).
+"""
+
+import os
+
+import pandas as pd
+
+# Suffixe des mesures XAIR -> code STATION (clé de style.NOMS)
+STATIONS = {'PRE': 'PRESID',
+            'DAL': 'DALTON',
+            'NIC': 'NICOLA',
+            'HUG': 'HUGO',
+            'FON': 'FONTAI',
+            'GAR': 'GARROS',
+            'AIN': 'AINE',
+            'VIC': 'VICTOR',
+            'IPA': 'IPAPER',
+            'MER': 'MERA',
+            'MAD': 'MADOUM'}
+
+COLONNES = ['MESURE', 'STATION', 'POLLUANT', 'TYPO', 'HISTO', 'PMNC']
+
+CATALOGUES = {}   # catalogues partagés, par fichier (voir charge)
+
+
+def station(mes):
+    """Code STATION d'après le suffixe de la mesure (None si inconnu)"""
+    return STATIONS.get(mes.rsplit('_', 1)[-1])
+
+
+class Catalogue(object):
+    """Table des mesures (DataFrame indexé par MESURE) et groupes de
+    mesures moyennés ensemble, par polluant"""
+
+    def __init__(self, table, groupes):
+        self.table   = table
+        self.groupes_polluant = groupes   # {polluant: [(mesures, typo, histo)]}
+        self._lignes = {}
+        for ligne in table.to_dict('records'):
+            # NaN de la colonne HISTO (paramètre histo de la figure) : None
+            histo = ligne['HISTO']
+            ligne['HISTO'] = None if histo is None or histo != histo else int(histo)
+            self._lignes[ligne['MESURE']] = ligne
+
+    @classmethod
+    def depuis(cls, typos, polluants, historiques, pmnc):
+        """Catalogue des définitions de typo.py : typos (Typo), polluants
+        (Polluant), historiques {typo: {polluant: année ou None}},
+        pmnc {typo: mesures PM10 non corrigées, même ordre}"""
+        typo_groupe = {}
+        for t in typos:
+            for mesures in t.get_malist():
+                typo_groupe[tuple(mesures)] = t.get_nom()
+
+        lignes  = []
+        groupes = {}
+        for p in polluants:
+            nom = p.get_nom()
+            for mesures in p.get_malist():
+                typo  = typo_groupe[tuple(mesures)]
+                histo = historiques[typo][nom]
+                groupes.setdefault(nom, []).append((mesures, typo, histo))
+                nc = pmnc.get(typo, []) if nom == 'PM10' else []
+                for i, mes in enumerate(mesures):
+                    lignes.append((mes, station(mes), nom, typo, histo,
+                                   nc[i] if i < len(nc) else None))
+        return cls(cls._table(lignes), groupes)
+
+    @staticmethod
+    def _table(lignes):
+        return pd.DataFrame(lignes, columns=COLONNES).set_index('MESURE', drop=False)
+
+    @classmethod
+    def lit(cls, fichier):
+        """Catalogue conservé par ecrit()"""
+        df = pd.read_csv(fichier, dtype=str, encoding='utf-8', keep_default_na=False)
+        lignes  = []
+        groupes = {}
+        index   = {}   # (polluant, typo) -> rang du groupe
+        for r in df.to_dict('records'):
+            histo = int(r['HISTO']) if r['HISTO'] else None
+            cle = (r['POLLUANT'], r['TYPO'])
+            if cle not in index:
+                index[cle] = len(groupes.setdefault(r['POLLUANT'], []))
+                groupes[r['POLLUANT']].append(([], r['TYPO'], histo))
+            groupes[r['POLLUANT']][index[cle]][0].append(r['MESURE'])
+            lignes.append((r['MESURE'], r['STATION'] or None, r['POLLUANT'], r['TYPO'],
+                           histo, r['PMNC'] or None))
+        return cls(cls._table(lignes), groupes)
+
+    def ecrit(self, fichier):
+        dossier = os.path.dirname(fichier)
+        if dossier and not os.path.isdir(dossier):
+            os.makedirs(dossier)
+        table = self.table.copy()
+        histos = [self._lignes[mes]['HISTO'] for mes in table['MESURE']]
+        table['HISTO'] = ['' if h is None else '%i' % h for h in histos]
+        table.to_csv(fichier, index=False, encoding='utf-8')
+
+    def pmnc(self, mes):
+        """Mesure PM10 non corrigée correspondant à mes (None sinon)"""
+        return self._lignes[mes]['PMNC']
+
+    def groupes(self, polluant):
+        """Groupes moyennés ensemble pour polluant : [(mesures, typo, histo)]"""
+        return self.groupes_polluant.get(polluant, [])
+
+
+def charge(fichier=None):
+    """Catalogue partagé : lu dans fichier s'il est donné et existe,
+    sinon construit depuis typo.py (et écrit dans fichier)"""
+    if fichier not in CATALOGUES:
+        if fichier is not None and os.path.exists(fichier):
+            CATALOGUES[fichier] = Catalogue.lit(fichier)
+        else:
+            from pyair_fig import typo   # typo.py utilise le catalogue
+            CATALOGUES[fichier] = Catalogue.depuis(typo.stations, typo.list_polluants,
+                                                   typo.HISTORIQUES, typo.PMNC)
+            if fichier is not None:
+                CATALOGUES[fichier].ecrit(fichier)
+    return CATALOGUES[fichier]
@@ -0,0 +1,312 @@
+# -*- coding: UTF-8 -*-
+#Nom :  : chrono.py
+#Description    : Durée, lignes et mémoire de chaque étape de génération des figures
+#Copyright  : 2015, LIMAIR
+
+"""Instrumentation des figures.
+
+Chaque étape d'une figure (extraction, validite, agregation, trace,
+seuils, legende, sauvegarde) est encadrée par
+
+    with chrono.etape('trace') as e:
+        ...
+        e.lignes = len(df.index)
+
+et la figure entière par chrono.figure(figname). Désactivée (défaut),
+etape() rend un objet vide partagé : le coût est celui d'un test. Activée
+par active(fichier) ou par la variable d'environnement PYAIR_FIG_CHRONO
+(chemin du fichier), chaque étape produit un relevé :
+    figure, etape, duree (s), lignes, memoire_max (pic de mémoire
+    résidente pendant l'étape, octets), rss_variation (mémoire résidente
+    en fin d'étape moins en début d'étape, octets), pid.
+Pic par étape : sous Linux, le pic de mémoire résidente du processus
+(VmHWM de /proc/self/status) est remis à zéro en début d'étape
+(/proc/self/clear_refs) ; ailleurs, pic des allocations suivies par
+tracemalloc (Python 3), ou None (Python 2). Hors Linux, rss_variation
+vaut None.
+Format 'json' (défaut) : une ligne JSON par relevé, ajoutée au fichier dès
+la fin de l'étape. Format 'prometheus' (fichier en .prom) : relevés cumulés
+par figure et étape, fichier texte réécrit par ecrit() et à la sortie du
+programme (collecteur textfile de node_exporter).
+"""
+
+import os
+import json
+import time
+import atexit
+import datetime
+import threading
+
+try:
+    import tracemalloc
+except ImportError:   # Python 2
+    tracemalloc = None
+
+try:
+    chrono = time.perf_counter
+except AttributeError:
+    chrono = time.time
+
+ACTIF    = False
+FICHIER  = None
+FORMAT   = 'json'
+MEMOIRE  = True
+PIC      = None   # source du pic par étape : 'rss' (Linux), 'tracemalloc' ou None
+RELEVES  = []   # relevés en attente d'écriture (format prometheus)
+VARIABLE = 'PYAIR_FIG_CHRONO'
+
+_local  = threading.local()
+_verrou = threading.Lock()
+
+
+class _Rien(object):
+    """Étape sans mesure (instrumentation désactivée)"""
+    lignes = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+RIEN = _Rien()
+
+
+def rss():
+    """Mémoire résidente du processus (octets, None hors Linux)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (IOError, OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _pic_rss():
+    """Pic de mémoire résidente depuis la dernière remise à zéro (octets)"""
+    with open('/proc/self/status') as f:
+        for ligne in f:
+            if ligne.startswith('VmHWM:'):
+                return int(ligne.split()[1]) * 1024
+    return None
+
+
+def _remet_pic_rss():
+    """Remet le pic de mémoire résidente à la mémoire courante (Linux >= 4.0)"""
+    with open('/proc/self/clear_refs', 'w') as f:
+        f.write('5')
+
+
+def _source_pic():
+    """'rss' si le pic de mémoire résidente peut être remis à zéro,
+    sinon 'tracemalloc' si disponible, sinon None"""
+    try:
+        _remet_pic_rss()
+        if _pic_rss() is not None:
+            return 'rss'
+    except (IOError, OSError, ValueError):
+        pass
+    return 'tracemalloc' if tracemalloc is not None else None
+
+
+def _pic():
+    """Pic de mémoire depuis la dernière remise à zéro (source PIC)"""
+    if PIC == 'rss':
+        return _pic_rss()
+    if PIC == 'tracemalloc' and tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[1]
+    return None
+
+
+def _remet_pic():
+    if PIC == 'rss':
+        _remet_pic_rss()
+    elif PIC == 'tracemalloc' and tracemalloc.is_tracing() and hasattr(tracemalloc, 'reset_peak'):
+        tracemalloc.reset_peak()
+
+
+def _pile():
+    if not hasattr(_local, 'pile'):
+        _local.pile = []
+        _local.figure = None
+    return _local.pile
+
+
+class Etape(object):
+    def __init__(self, nom, figure=None):
+        self.nom    = nom
+        self.figure = figure
+        self.lignes = None
+        self.pic    = 0
+
+    def __enter__(self):
+        pile = _pile()
+        if self.figure is None:
+            self.figure = _local.figure
+        self.rss = None
+        if MEMOIRE:
+            self.rss = rss()
+            if PIC is not None:
+                self._pic_parent()
+                _remet_pic()
+        pile.append(self)
+        self.debut = chrono()
+        return self
+
+    def _pic_parent(self):
+        """Reporte sur l'étape englobante le pic atteint jusqu'ici"""
+        pile = _pile()
+        if pile:
+            pile[-1].pic = max(pile[-1].pic, _pic() or 0)
+
+    def __exit__(self, *exc):
+        duree = chrono() - self.debut
+        pile = _pile()
+        pile.pop()
+        memoire = variation = None
+        if MEMOIRE and PIC is not None:
+            self.pic = max(self.pic, _pic() or 0)
+            memoire = self.pic
+            if pile:
+                pile[-1].pic = max(pile[-1].pic, self.pic)
+        if MEMOIRE and self.rss is not None:
+            fin = rss()
+            variation = None if fin is None else fin - self.rss
+        enregistre({'date'          : datetime.datetime.now().strftime('%Y-%m-%dT%H:%M:%S'),
+                    'figure'        : self.figure,
+                    'etape'         : self.nom,
+                    'duree'         : round(duree, 6),
+                    'lignes'        : self.lignes,
+                    'memoire_max'   : memoire,
+                    'rss_variation' : variation,
+                    'pid'           : os.getpid()})
+        return False
+
+
+def etape(nom, figure=None):
+    """Contexte mesurant l'étape nom (de la figure en cours)"""
+    if not ACTIF:
+        return RIEN
+    return Etape(nom, figure)
+
+
+class _Figure(object):
+    def __init__(self, figname):
+        self.figname = figname
+
+    def __enter__(self):
+        _pile()
+        self.precedente = _local.figure
+        _local.figure = self.figname
+        self.etape = Etape('figure', self.figname).__enter__()
+        return self.etape
+
+    def __exit__(self, *exc):
+        self.etape.__exit__(*exc)
+        _local.figure = self.precedente
+        return False
+
+
+def figure(figname):
+    """Contexte d'une figure : les étapes y sont rattachées, la figure
+    entière fait l'objet d'un relevé 'figure'"""
+    if not ACTIF:
+        return RIEN
+    return _Figure(figname)
+
+
+def active(fichier, format=None, memoire=True):
+    """Active l'instrumentation ; format 'json' (défaut) ou 'prometheus'
+    (défaut si fichier se termine par .prom)"""
+    global ACTIF, FICHIER, FORMAT, MEMOIRE, PIC
+    if format is None:
+        format = 'prometheus' if fichier.endswith('.prom') else 'json'
+    if format not in ('json', 'prometheus'):
+        raise ValueError("Format inconnu : %s (json, prometheus)" % format)
+    FICHIER, FORMAT, MEMOIRE = fichier, format, memoire
+    PIC = _source_pic() if MEMOIRE else None
+    if PIC == 'tracemalloc' and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    ACTIF = True
+
+
+def desactive():
+    global ACTIF
+    ecrit()
+    ACTIF = False
+    if tracemalloc is not None and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def enregistre(releve):
+    """Écrit (json) ou conserve (prometheus) un relevé"""
+    with _verrou:
+        if FORMAT == 'json':
+            with open(FICHIER, 'a') as f:
+                f.write(json.dumps(releve, sort_keys=True) + '\n')
+        else:
+            RELEVES.append(releve)
+
+
+def extrait():
+    """Relevés en attente, retirés (transmis par les processus de rendu)"""
+    with _verrou:
+        res = RELEVES[:]
+        del RELEVES[:]
+    return res
+
+
+def ajoute(releves):
+    """Relevés d'un autre processus (voir extrait)"""
+    with _verrou:
+        RELEVES.extend(releves)
+
+
+def _etiquette(valeur):
+    return ('%s' % valeur).replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')
+
+
+def prometheus(releves):
+    """Métriques au format texte Prometheus : durées et lignes cumulées,
+    mémoire maximale par figure et étape (absente si non mesurée)"""
+    cumul = {}
+    for r in releves:
+        cle = (r['figure'] or '', r['etape'])
+        c = cumul.setdefault(cle, {'secondes': 0., 'lignes': 0, 'memoire_octets': 0, 'total': 0})
+        c['secondes'] += r['duree']
+        c['lignes']   += r['lignes'] or 0
+        c['memoire_octets'] = max(c['memoire_octets'], r['memoire_max'] or 0)
+        c['total']    += 1
+    aides = {'secondes'       : "Duree des etapes de generation des figures (s)",
+             'lignes'         : "Lignes traitees par etape",
+             'memoire_octets' : "Pic de memoire pendant l'etape (octets)",
+             'total'          : "Nombre d'executions de l'etape"}
+    mesures = ('secondes', 'lignes', 'memoire_octets', 'total')
+    if all(r['memoire_max'] is None for r in releves):
+        mesures = ('secondes', 'lignes', 'total')   # pas de mesure de mémoire
+    lignes = []
+    for mesure in mesures:
+        nom = 'pyair_fig_etape_' + mesure
+        lignes.append('# HELP %s %s' % (nom, aides[mesure]))
+        lignes.append('# TYPE %s gauge' % nom)
+        for (fig, nom_etape), c in sorted(cumul.items()):
+            lignes.append('%s{figure="%s",etape="%s"} %s'
+                          % (nom, _etiquette(fig), _etiquette(nom_etape), repr(c[mesure])))
+    return '\n'.join(lignes) + '\n'
+
+
+def ecrit():
+    """Écrit le fichier Prometheus (format prometheus)"""
+    if not ACTIF or FORMAT != 'prometheus':
+        return
+    with _verrou:
+        texte = prometheus(RELEVES)
+    if not isinstance(texte, str):   # unicode (Python 2)
+        texte = texte.encode('utf-8')
+    with open(FICHIER, 'w') as f:
+        f.write(texte)
+
+
+atexit.register(ecrit)
+
+if os.environ.get(VARIABLE):
+    active(os.environ[VARIABLE])
@@ -0,0 +1,239 @@
+# -*- coding: UTF-8 -*-
+#Nom :  : cli.py
+#Description    : Génération de figures depuis la ligne de commande ou un fichier de travaux
+#Copyright  : 2015, LIMAIR
+
+"""Lancement sans modifier les scripts.
+
+    python -m pyair_fig travaux.json [--dry-run] [--force] [--connexions N] [--chrono FICHIER]
+    python -m pyair_fig ma --figname O3juillet2015 --polluant O3:O3_PRE,O3_GAR \\
+                           --set debut=2015-07-01 --set fin=2015-07-31 --set GLISSANT=true
+    python -m pyair_fig typo --set polluant=PM10 --set ANNEE=2015
+    python -m pyair_fig typo --set 'polluant=["NO2","O3","SO2","PM10","PM25","CO","TRS"]'
+    python -m pyair_fig mf --figname limoges --set 'parametres=["T","U"]'
+
+Fichier de travaux (JSON, ou YAML si PyYAML est installé) : une liste de
+figures, ou un dict {"connexions": 4, "processus": 1, "figures": [...]}.
+Chaque figure est un dict de paramètres (mêmes noms que les variables des
+scripts, défauts dans ma.py, typo.py et mf.py) avec une clé "type" : "ma"
+(défaut), "typo" ou "mf". Pour "ma", les mesures d'un polluant peuvent
+être un dict de filtres d'IndexMesures.liste :
+    {"type": "ma", "figname": "O3juillet2015",
+     "polluants": [["O3", {"reseau": "OZONE"}]], "debut": "2015-07-01", ...}
+
+Toutes les figures tournent dans le même processus : les extractions
+XAIR passent par un seul PoolXAIR (cache commun), les figures ma d'un
+lot partagent leurs extractions (batch.py), les figures typo leurs
+agrégats (stock.py) et les figures mf une extraction par station.
+"""
+
+from __future__ import print_function
+
+import argparse
+import importlib
+import io
+import json
+import sys
+
+# Modules des figures (importés à l'usage : pandas, numpy et matplotlib ne
+# sont pas chargés pour --help ou une erreur d'arguments)
+TYPES = ('ma', 'typo', 'mf')
+
+CONNEXIONS = 4    # Nombre max de connexions simultanées à XAIR
+PROCESSUS  = 1    # Processus de rendu des figures ma (1 : séquentiel, None : un par cœur)
+
+
+def lit(chemin):
+    """Travaux du fichier chemin (JSON ou YAML) : dict connexions,
+    processus, figures"""
+    with io.open(chemin, encoding='utf-8') as f:
+        texte = f.read()
+    if chemin.endswith(('.yml', '.yaml')):
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError("PyYAML est nécessaire pour lire %s (ou utiliser JSON)" % chemin)
+        travaux = yaml.safe_load(texte)
+    else:
+        travaux = json.loads(texte)
+    if isinstance(travaux, list):
+        travaux = {'figures': travaux}
+    travaux.setdefault('connexions', CONNEXIONS)
+    travaux.setdefault('processus', PROCESSUS)
+    return travaux
+
+
+def valeur(texte):
+    """Valeur d'un paramètre en ligne de commande : JSON si possible
+    (nombres, true/false/null, listes), sinon chaîne"""
+    try:
+        return json.loads(texte)
+    except ValueError:
+        return texte
+
+
+def figure_args(args):
+    """Figure décrite par les arguments d'une sous-commande"""
+    f = {'type': args.type}
+    if args.figname is not None:
+        f['figname'] = args.figname
+    for param in args.set or []:
+        if '=' not in param:
+            raise ValueError(u"Paramètre attendu sous la forme CLE=VALEUR : %s" % param)
+        cle, texte = param.split('=', 1)
+        f[cle.strip()] = valeur(texte)
+    if getattr(args, 'polluant', None):
+        if args.type != 'ma':
+            raise ValueError("--polluant ne concerne que les figures ma")
+        f['polluants'] = []
+        for p in args.polluant:
+            nom, _, mesures = p.partition(':')
+            f['polluants'].append([nom, mesures.split(',') if mesures else []])
+    return f
+
+
+def module(t):
+    """Module pyair_fig du type de figure t"""
+    return importlib.import_module('pyair_fig.' + t)
+
+
+def _params(f):
+    """Type et paramètres d'une figure du fichier de travaux"""
+    f = dict(f)
+    t = f.pop('type', 'ma')
+    if t not in TYPES:
+        raise ValueError("Type de figure inconnu : %s (%s)" % (t, ', '.join(sorted(TYPES))))
+    if 'SORTIES' in f:
+        f['SORTIES'] = tuple(f['SORTIES'])
+    return t, f
+
+
+def verifie(figures):
+    """Paramètres complets de chaque figure, sans connexion : [(type, spec)]"""
+    res = []
+    for f in figures:
+        t, params = _params(f)
+        if t == 'ma':
+            # filtres d'IndexMesures.liste : résolus à l'exécution
+            params['polluants'] = [(famille, [] if isinstance(mesures, dict) else mesures)
+                                   for famille, mesures in params.get('polluants', [])]
+        res.append((t, module(t).spec(**params)))
+    return res
+
+
+def execute(travaux):
+    """Génère les figures des travaux ; renvoie la liste des figures"""
+    from pyair_fig import batch
+    from pyair_fig import connexion
+    from pyair_fig import extraction
+    from pyair_fig import parallele
+    from pyair_fig import stations
+    from pyair_fig.stock import StockAgregats
+
+    verifie(travaux['figures'])
+    par_type = {}
+    for f in travaux['figures']:
+        t, params = _params(f)
+        par_type.setdefault(t, []).append(params)
+
+    # Connexions ouvertes à la première requête hors cache
+    xr = extraction.PoolXAIR(connexion.xair_cache, travaux['connexions'])
+    res = []
+    if 'ma' in par_type:
+        index = stations.IndexMesures(xr)
+        figures = []
+        for params in par_type['ma']:
+            params['polluants'] = [(famille, index.liste(**mesures) if isinstance(mesures, dict)
+                                             else mesures)
+                                   for famille, mesures in params.get('polluants', [])]
+            figures.append(params)
+        if travaux['processus'] == 1:
+            res += batch.execute(figures, xr, index)
+        else:
+            res += parallele.execute(figures, xr, index, travaux['processus'])
+    if 'typo' in par_type:
+        res += module('typo').execute(par_type['typo'], StockAgregats(xr))
+    if 'mf' in par_type:
+        res += module('mf').execute(par_type['mf'], connexion.meteo_france())
+    return res
+
+
+def erreur(e):
+    """Message de l'erreur e sur la sortie d'erreur (texte accentué en
+    str ou unicode sous Python 2)"""
+    message = e.args[0] if e.args else ''
+    if isinstance(message, bytes):   # str (Python 2)
+        message = message.decode('utf-8')
+    texte = u'Erreur : %s\n' % message
+    if not isinstance(texte, str):   # unicode (Python 2)
+        texte = texte.encode(getattr(sys.stderr, 'encoding', None) or 'utf-8', 'replace')
+    sys.stderr.write(texte)
+
+
+def arguments():
+    commun = argparse.ArgumentParser(add_help=False)
+    commun.add_argument('--connexions', type=int, default=None,
+                        help="connexions simultanées à XAIR (défaut %i)" % CONNEXIONS)
+    commun.add_argument('--processus', type=int, default=None,
+                        help="processus de rendu des figures ma (défaut %i, 0 : un par cœur)" % PROCESSUS)
+    commun.add_argument('--dry-run', action='store_true',
+                        help="vérifie les paramètres et liste les figures sans rien extraire")
+    commun.add_argument('--force', action='store_true',
+                        help="redessine les figures même si elles sont à jour")
+    commun.add_argument('--chrono', metavar='FICHIER',
+                        help="durée, lignes et mémoire de chaque étape (JSON, Prometheus si .prom)")
+
+    parser = argparse.ArgumentParser(prog='python -m pyair_fig',
+                                     description="Génération de figures standardisées")
+    sous = parser.add_subparsers(dest='type')
+    sous.required = True
+    travaux = sous.add_parser('travaux', parents=[commun],
+                              help="fichier de travaux JSON ou YAML")
+    travaux.add_argument('fichier')
+    for t in sorted(TYPES):
+        p = sous.add_parser(t, parents=[commun],
+                            help="une figure %s (défauts : pyair_fig/%s.py)" % (t, t))
+        p.add_argument('--figname')
+        p.add_argument('--set', action='append', metavar='CLE=VALEUR',
+                       help="paramètre de la figure (valeur JSON ou texte), répétable")
+        if t == 'ma':
+            p.add_argument('--polluant', action='append', metavar='FAMILLE:MES1,MES2',
+                           help="famille et mesures d'un polluant, répétable")
+    return parser
+
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    # python -m pyair_fig travaux.json : sous-commande travaux implicite
+    if argv and argv[0] not in TYPES and argv[0] not in ('travaux', '-h', '--help'):
+        argv.insert(0, 'travaux')
+    args = arguments().parse_args(argv)
+
+    if args.type == 'travaux':
+        travaux = lit(args.fichier)
+    else:
+        travaux = {'figures': [figure_args(args)],
+                   'connexions': CONNEXIONS, 'processus': PROCESSUS}
+    if args.connexions is not None:
+        travaux['connexions'] = args.connexions
+    if args.processus is not None:
+        travaux['processus'] = args.processus or None
+    if args.force:
+        for f in travaux['figures']:
+            f['FORCE'] = True
+
+    try:
+        specs = verifie(travaux['figures'])
+    except ValueError as e:
+        erreur(e)
+        return 2
+    if args.dry_run:
+        for t, s in specs:
+            print('%-5s %s' % (t, s['figname']))
+        return 0
+    if args.chrono:
+        from pyair_fig import chrono
+        chrono.active(args.chrono)
+    for figname in execute(travaux):
+        print(figname)
+    return 0
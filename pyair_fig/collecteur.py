@@ -0,0 +1,66 @@
+# -*- coding: UTF-8 -*-
+#Nom :  : collecteur.py
+#Description    : Statistiques cumulées des séries tracées (échelle, index)
+#Copyright  : 2015, LIMAIR
+
+"""Collecteur de statistiques pour l'échelle des figures.
+
+Remplace le tampon tmp = tmp.append(df) des scripts : chaque série tracée
+met à jour min, max, bornes de l'index et un résumé par colonne, sans
+conserver les données.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class Collecteur(object):
+    def __init__(self):
+        self.min    = np.nan
+        self.max    = np.nan
+        self.debut  = None
+        self.fin    = None
+        self.freq   = None
+        self.series = {}     # colonne -> [nombre, somme, min, max]
+
+    def ajoute(self, df):
+        """Prend en compte un DataFrame (ou une Series) tracé"""
+        if isinstance(df, pd.Series):
+            df = df.to_frame()
+        if len(df.index) == 0:
+            return
+        for col, serie in df.iteritems():
+            n = serie.count()
+            if n == 0:
+                continue
+            mini, maxi, somme = serie.min(), serie.max(), serie.sum()
+            self.min = np.fmin(self.min, mini)
+            self.max = np.fmax(self.max, maxi)
+            res = self.series.get(col)
+            if res is None:
+                self.series[col] = [n, somme, mini, maxi]
+            else:
+                res[0] += n
+                res[1] += somme
+                res[2]  = min(res[2], mini)
+                res[3]  = max(res[3], maxi)
+
+        debut, fin = df.index.min(), df.index.max()
+        self.debut = debut if self.debut is None else min(self.debut, debut)
+        self.fin   = fin if self.fin is None else max(self.fin, fin)
+        if self.freq is None:
+            self.freq = df.index.freqstr
+
+    def index(self):
+        """Index couvrant toutes les séries ajoutées"""
+        if self.debut is None:
+            return pd.DatetimeIndex([])
+        if self.freq is None:
+            return pd.DatetimeIndex([self.debut, self.fin])
+        return pd.date_range(self.debut, self.fin, freq=self.freq)
+
+    def resume(self):
+        """Nombre de valeurs, moyenne, min et max de chaque colonne"""
+        lignes = dict((col, {'nombre': n, 'moyenne': somme / n, 'min': mini, 'max': maxi})
+                      for col, (n, somme, mini, maxi) in self.series.items())
+        return pd.DataFrame(lignes).T[['nombre', 'moyenne', 'min', 'max']]
@@ -0,0 +1,59 @@
+# -*- coding: UTF-8 -*-
+#Nom :  : connexion.py
+#Description    : Connexions XAIR et Météo-France ouvertes à la première requête
+#Copyright  : 2015, LIMAIR
+
+"""Connexions différées.
+
+Les scripts n'ouvrent plus de connexion à l'import : pyair n'est importé
+et le client n'est créé qu'à la première requête qui doit vraiment
+interroger la base. Une figure servie par le cache (cache.CacheXAIR,
+stock, empreinte) ne se connecte jamais.
+"""
+
+import threading
+
+from pyair_fig import cache
+
+XAIR = {'user': 'RSDBA', 'pwd': 'RSDBA', 'adr': '172.16.45.33'}   # paramètres de xair.XAIR
+
+
+class Paresseux(object):
+    """Objet créé par fabrique() au premier attribut demandé"""
+
+    def __init__(self, fabrique):
+        self._fabrique = fabrique
+        self._objet    = None
+        self._verrou   = threading.Lock()
+
+    def objet(self):
+        with self._verrou:
+            if self._objet is None:
+                self._objet = self._fabrique()
+        return self._objet
+
+    def __getattr__(self, attr):
+        if attr.startswith('__'):
+            raise AttributeError(attr)
+        return getattr(self.objet(), attr)
+
+
+def xair(**params):
+    """Connexion xair.XAIR (XAIR par défaut)"""
+    from pyair import xair
+    return xair.XAIR(**(params or XAIR))
+
+
+def xair_cache(dossier='../Cache'):
+    """cache.CacheXAIR dont la connexion n'est ouverte qu'au premier manque"""
+    return cache.CacheXAIR(Paresseux(xair), dossier)
+
+
+def _meteo_france():
+    from pyair import meteo_france
+    return meteo_france.METEO_FRANCE()
+
+
+def meteo_france():
+    """Client meteo_france.METEO_FRANCE créé à la première requête"""
+    return Paresseux(_meteo_france)
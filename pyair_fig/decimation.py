@@ -0,0 +1,110 @@
+# -*- coding: UTF-8 -*-
+#Nom :  : decimation.py
+#Description    : Réduction des points tracés à la largeur de la figure
+#Copyright  : 2015, LIMAIR
+
+"""Réduction des séries avant tracé.
+
+Une série horaire d'un an (ou quart-horaire pour H2S) compte bien plus de
+points que la figure n'a de colonnes de pixels. reduit() ne garde que les
+points visibles :
+    - 'minmax' : premier point, min et max de chaque colonne de pixels ;
+      tous les pics (dépassements de seuils) restent visibles ;
+    - 'lttb'   : Largest Triangle Three Buckets, un point par paquet choisi
+      pour conserver l'allure de la courbe.
+Les lacunes (NaN) sont conservées : un NaN est gardé dans chaque paquet
+qui en contient, la ligne reste donc interrompue aux mêmes endroits.
+La série réduite est indexée par périodes (PeriodIndex de même fréquence) :
+pandas la trace sur le même axe des dates que la série complète.
+"""
+
+import numpy as np
+
+from pyair_fig import style
+
+METHODES = ('minmax', 'lttb')
+
+
+def colonnes(size):
+    """Nombre de colonnes de pixels de la zone de tracé d'une figure size"""
+    return int(style.SIZE[size][0] * style.AXE[size][2] * style.DPI)
+
+
+def _paquets(n, nombre):
+    """Bornes de nombre paquets contigus (non vides si n >= nombre) de n positions"""
+    return np.linspace(0, n, nombre + 1).astype(np.int64)
+
+
+def _premiers(positions, bornes):
+    """Première des positions de chaque paquet"""
+    paquets = np.searchsorted(bornes, positions, side='right') - 1
+    return positions[np.unique(paquets, return_index=True)[1]]
+
+
+def _lacunes(y, bornes):
+    """Premier NaN de chaque paquet qui en contient"""
+    return _premiers(np.flatnonzero(np.isnan(y)), bornes)
+
+
+def minmax(y, nombre):
+    """Positions gardées : premier point, min et max de chacun des nombre paquets"""
+    bornes = _paquets(len(y), nombre)
+    tailles = np.diff(bornes)
+    manque = np.isnan(y)
+    bas  = np.where(manque, np.inf, y)
+    haut = np.where(manque, -np.inf, y)
+    mins = np.repeat(np.minimum.reduceat(bas, bornes[:-1]), tailles)
+    maxs = np.repeat(np.maximum.reduceat(haut, bornes[:-1]), tailles)
+    return np.unique(np.concatenate([bornes[:-1], [len(y) - 1],
+                                     _premiers(np.flatnonzero(bas == mins), bornes),
+                                     _premiers(np.flatnonzero(haut == maxs), bornes),
+                                     _lacunes(y, bornes)]))
+
+
+def lttb(y, points):
+    """Positions des points gardés par LTTB (premier, dernier et un par paquet)"""
+    n = len(y)
+    bornes = np.r_[0, _paquets(n - 2, points - 2) + 1, n]
+
+    # Point moyen de chaque paquet (le premier et le dernier point sont seuls)
+    ok = ~np.isnan(y)
+    comptes = np.add.reduceat(ok.astype(np.int64), bornes[:-1])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cy = np.add.reduceat(np.where(ok, y, 0.), bornes[:-1]) / comptes
+    cx = (bornes[:-1] + bornes[1:] - 1) / 2.
+
+    garde = [0]
+    xa, ya = 0., y[0]
+    for i in range(1, points - 1):
+        d, f = bornes[i], bornes[i + 1]
+        bx, by = cx[i + 1], cy[i + 1]
+        if np.isnan(ya):
+            ya = by
+        if np.isnan(by):
+            by = ya
+        aires = np.abs((xa - bx) * (y[d:f] - ya) - (xa - np.arange(d, f)) * (by - ya))
+        if comptes[i] == 0 or np.isnan(aires).all():
+            j = d
+        else:
+            j = d + int(np.nanargmax(aires))
+            xa, ya = float(j), y[j]
+        garde.append(j)
+    garde.append(n - 1)
+    return np.unique(np.concatenate([garde, _lacunes(y, bornes)]))
+
+
+def reduit(serie, nombre, methode='minmax'):
+    """Série réduite à environ 2 x nombre points (nombre : colonnes de pixels) ;
+    rendue telle quelle si elle est déjà plus courte ou sans fréquence"""
+    if methode not in METHODES:
+        raise ValueError("methode : %s" % ', '.join(METHODES))
+    if len(serie) <= 2 * nombre or serie.index.freq is None:
+        return serie
+    y = np.asarray(serie.values, dtype=np.float64)
+    if methode == 'minmax':
+        positions = minmax(y, nombre)
+    else:
+        positions = lttb(y, 2 * nombre)
+    reduite = serie.iloc[positions]
+    reduite.index = serie.index[positions].to_period(serie.index.freq)
+    return reduite
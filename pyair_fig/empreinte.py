@@ -0,0 +1,97 @@
+# -*- coding: UTF-8 -*-
+#Nom :  : empreinte.py
+#Description    : Empreinte des figures (paramètres + données) pour éviter les rendus inutiles
+#Copyright  : 2015, LIMAIR
+
+"""Empreinte des figures.
+
+L'empreinte (SHA-1) d'une figure combine ses paramètres, ses légendes, les
+données tracées et le paramétrage commun du rendu (style). Elle est
+conservée à côté de la figure (<DOSSIER><figname>.empreinte) : tant
+qu'elle ne change pas et que les fichiers de sortie existent, la figure
+n'est pas redessinée. VERSION est à incrémenter quand le code du rendu
+change sans que les paramètres changent.
+"""
+
+import os
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from pyair_fig import style
+
+VERSION = 1
+
+
+def _ajoute(h, objet):
+    """Ajoute au hash h une représentation stable de objet"""
+    if isinstance(objet, (pd.DataFrame, pd.Series)):
+        h.update(b'df')
+        if isinstance(objet, pd.Series):
+            objet = objet.to_frame()
+        _ajoute(h, list(objet.columns))
+        if isinstance(objet.index, pd.DatetimeIndex):
+            h.update(np.ascontiguousarray(objet.index.asi8).tobytes())
+            _ajoute(h, objet.index.freqstr)
+        else:
+            _ajoute(h, list(objet.index))
+        if all(np.issubdtype(t, np.number) for t in objet.dtypes):
+            h.update(np.ascontiguousarray(objet.values, dtype=np.float64).tobytes())
+        else:   # liste de mesures (xr.liste_mesures().MESURE)
+            _ajoute(h, objet.values.tolist())
+    elif isinstance(objet, dict):
+        h.update(b'{')
+        for cle in sorted(objet, key=repr):
+            _ajoute(h, cle)
+            _ajoute(h, objet[cle])
+        h.update(b'}')
+    elif isinstance(objet, (list, tuple)):
+        h.update(b'[')
+        for o in objet:
+            _ajoute(h, o)
+        h.update(b']')
+    elif hasattr(objet, 'get_nom'):   # famille de polluant (ma.Polluant)
+        _ajoute(h, (objet.get_nom(), objet.get_freq()))
+    else:
+        h.update(repr(objet).encode('utf-8'))
+        h.update(b';')
+
+
+def calcule(*objets):
+    """Empreinte (hexadécimal) des objets et du paramétrage du rendu"""
+    h = hashlib.sha1()
+    _ajoute(h, [VERSION, style.SIZE, style.AXE, style.DPI, style.LINEWIDTH,
+                style.XFONTSIZE, style.UNITSIZE, style.LEGFONTSIZE])
+    for objet in objets:
+        _ajoute(h, objet)
+    return h.hexdigest()
+
+
+def donnees(*objets):
+    """Empreinte (hexadécimal) des seuls objets, sans le paramétrage du
+    rendu : clé des données conservées (agrégats incrémentaux)"""
+    h = hashlib.sha1()
+    for objet in objets:
+        _ajoute(h, objet)
+    return h.hexdigest()
+
+
+def fichier(figname):
+    return style.DOSSIER + figname + '.empreinte'
+
+
+def a_jour(figname, cle, chemins):
+    """True si la figure a déjà été écrite (tous les chemins) avec l'empreinte cle"""
+    if not all(os.path.exists(c) for c in chemins):
+        return False
+    try:
+        with open(fichier(figname)) as f:
+            return f.read().strip() == cle
+    except IOError:
+        return False
+
+
+def enregistre(figname, cle):
+    with open(fichier(figname), 'w') as f:
+        f.write(cle + '\n')
@@ -0,0 +1,105 @@
+# -*- coding: UTF-8 -*-
+#Nom :  : extraction.py
+#Description    : Extractions XAIR simultanées sur un pool de connexions
+#Copyright  : 2015, LIMAIR
+
+"""Extractions simultanées.
+
+Les requêtes get_mesures d'une figure sont indépendantes et passent
+l'essentiel de leur temps à attendre la base : PoolXAIR les envoie en
+parallèle (threads) sur un nombre borné de connexions, ouvertes à la
+demande, et rend les résultats dans l'ordre des requêtes.
+
+flux() rend les résultats un par un (générateur) : chaque extraction peut
+être réduite puis libérée avant l'arrivée de la suivante (années de
+stock.StockAgregats).
+"""
+
+import threading
+from collections import deque
+from multiprocessing.pool import ThreadPool
+
+try:
+    from Queue import Queue
+except ImportError:
+    from queue import Queue
+
+
+class PoolXAIR(object):
+    """Pool de taille connexions XAIR ; connexion() en crée une nouvelle
+    (xair.XAIR ou cache.CacheXAIR)"""
+
+    def __init__(self, connexion, taille=4):
+        self.connexion = connexion
+        self.taille    = taille
+        self.libres    = Queue()
+        self.ouvertes  = 0
+        self.verrou    = threading.Lock()
+
+    def _prend(self):
+        with self.verrou:
+            if self.libres.empty() and self.ouvertes < self.taille:
+                self.ouvertes += 1
+                return self.connexion()
+        return self.libres.get()
+
+    def _rend(self, xr):
+        self.libres.put(xr)
+
+    def get_mesures(self, mes, debut=None, fin=None, freq='H', **kwargs):
+        xr = self._prend()
+        try:
+            return xr.get_mesures(mes, debut=debut, fin=fin, freq=freq, **kwargs)
+        finally:
+            self._rend(xr)
+
+    def liste_mesures(self, *args, **kwargs):
+        xr = self._prend()
+        try:
+            return xr.liste_mesures(*args, **kwargs)
+        finally:
+            self._rend(xr)
+
+    def extrait(self, requetes):
+        """requetes : [(mes, debut, fin, freq)] ; renvoie les DataFrame
+        dans le même ordre"""
+        if len(requetes) <= 1:
+            return [self.get_mesures(*r) for r in requetes]
+        pool = ThreadPool(min(self.taille, len(requetes)))
+        try:
+            return pool.map(lambda r: self.get_mesures(*r), requetes, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+
+    def flux(self, requetes):
+        """Comme extrait, mais générateur : au plus taille requêtes en cours,
+        chaque résultat est rendu (dans l'ordre) dès qu'il est disponible"""
+        pool = ThreadPool(self.taille)
+        try:
+            en_cours = deque()
+            for r in requetes:
+                en_cours.append(pool.apply_async(self.get_mesures, r))
+                if len(en_cours) >= self.taille:
+                    yield en_cours.popleft().get()
+            while en_cours:
+                yield en_cours.popleft().get()
+        finally:
+            pool.close()
+            pool.join()
+
+
+def flux(xr, requetes):
+    """Générateur des résultats des requêtes [(mes, debut, fin, freq)]"""
+    if getattr(xr, 'flux', None) is not None:
+        return xr.flux(requetes)
+    return (xr.get_mesures(mes, debut=debut, fin=fin, freq=freq)
+            for mes, debut, fin, freq in requetes)
+
+
+def extrait(xr, requetes):
+    """Extractions [(mes, debut, fin, freq)], simultanées si xr est un PoolXAIR"""
+    if getattr(xr, 'extrait', None) is not None:
+        return xr.extrait(requetes)
+    return [xr.get_mesures(mes, debut=debut, fin=fin, freq=freq)
+            for mes, debut, fin, freq in requetes]
@@ -0,0 +1,210 @@
+# -*- coding: UTF-8 -*-
+#Nom :  : incremental.py
+#Description    : Agrégats tenus à jour depuis la dernière exécution
+#Copyright  : 2015, LIMAIR
+
+"""Mise à jour incrémentale des agrégats des figures.
+
+Les figures mensuelles ou annuelles sont regénérées chaque jour pour
+quelques heures de données nouvelles. Incremental reprend la chaîne de
+agregats.agrege (moyenne au pas frequence, moyenne glissante, max
+journalier, max annuel) étape par étape et ne garde que l'état utile à la
+suite : les valeurs de la période en cours pour les moyennes et max par
+période, les sur - 1 dernières valeurs pour la moyenne glissante, et les
+résultats définitifs. Chaque exécution n'extrait de XAIR que les lignes
+postérieures au dernier pas intégré ; le coût ne dépend plus de la
+longueur de la période de la figure.
+
+Les données des RECUL derniers jours peuvent encore être complétées ou
+validées dans XAIR : elles ne sont pas intégrées à l'état, seulement
+utilisées (agrégats provisoires) pour la figure du jour, et sont
+réextraites à l'exécution suivante.
+"""
+
+import os
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from pyair_fig import agregats
+from pyair_fig import empreinte
+from pyair_fig.cache import jour, liste, FORMAT, JOUR
+
+DOSSIER = '../Cache/incremental'
+RECUL   = pd.Timedelta(days=2)
+
+
+def _vide(k):
+    return np.empty((0, k)), pd.DatetimeIndex([])
+
+
+def _suite(blocs, freq):
+    """Concaténation de (valeurs, index) consécutifs sur la grille freq"""
+    blocs = [(v, i) for v, i in blocs if len(i)]
+    if not blocs:
+        return None
+    if len(blocs) == 1:
+        return blocs[0]
+    n = sum(len(i) for v, i in blocs)
+    return (np.vstack([v for v, i in blocs]),
+            pd.date_range(blocs[0][1][0], periods=n, freq=freq))
+
+
+class _Periode(object):
+    """Moyenne ou max par période regle ; garde les valeurs de la période en cours"""
+
+    def __init__(self, freq, regle, how, valides):
+        self.freq    = pd.tseries.frequencies.to_offset(freq)
+        self.regle   = regle
+        self.how     = how
+        self.valides = valides
+        self.reste   = None   # (valeurs, index) de la période en cours
+
+    def _avec_reste(self, valeurs, index):
+        return _suite([self.reste or (valeurs[:0], index[:0]), (valeurs, index)], self.freq) \
+            or (valeurs, index)
+
+    def ajoute(self, valeurs, index):
+        valeurs, index = self._avec_reste(valeurs, index)
+        if not len(index):
+            return valeurs, index
+        dernier = index[-1]
+        coupe = len(index)
+        if (dernier + self.freq).to_period(self.regle) == dernier.to_period(self.regle):
+            coupe = agregats.periodes(index, self.regle)[0][-1]   # période en cours
+        self.reste = (valeurs[coupe:], index[coupe:])
+        if coupe == 0:
+            return _vide(valeurs.shape[1])
+        res, _, dates = agregats.par_periode(valeurs[:coupe], index[:coupe],
+                                             self.regle, self.how, self.valides)
+        return res, dates
+
+    def apercu(self, valeurs, index):
+        valeurs, index = self._avec_reste(valeurs, index)
+        if not len(index):
+            return valeurs, index
+        res, _, dates = agregats.par_periode(valeurs, index, self.regle, self.how, self.valides)
+        return res, dates
+
+
+class _Glissante(object):
+    """Moyenne glissante sur sur pas ; garde les sur - 1 dernières valeurs"""
+
+    def __init__(self, freq, sur, valides):
+        self.freq    = pd.tseries.frequencies.to_offset(freq)
+        self.sur     = sur
+        self.valides = valides
+        self.queue   = None
+
+    def _calcule(self, valeurs, index):
+        nq = len(self.queue[1]) if self.queue is not None else 0
+        tout, tout_index = _suite([self.queue or (valeurs[:0], index[:0]), (valeurs, index)],
+                                  self.freq) or (valeurs, index)
+        moyennes, _ = agregats.glissante(tout, self.sur, self.valides)
+        return moyennes[nq:], tout_index[nq:], tout, tout_index
+
+    def ajoute(self, valeurs, index):
+        moyennes, index, tout, tout_index = self._calcule(valeurs, index)
+        garde = max(len(tout) - (self.sur - 1), 0)   # premiers morceaux plus courts que la fenêtre
+        self.queue = (tout[garde:], tout_index[garde:]) if self.sur > 1 else None
+        return moyennes, index
+
+    def apercu(self, valeurs, index):
+        return self._calcule(valeurs, index)[:2]
+
+
+class Incremental(object):
+    """Chaîne de agregats.agrege (mêmes paramètres) à partir de debut,
+    complétée par ajoute() avec les seules lignes nouvelles"""
+
+    def __init__(self, debut, freq, frequence='H', sur=None, max_journalier=False,
+                 max_annuel=False, valides=0.75):
+        self.freq     = pd.tseries.frequencies.to_offset(freq)
+        self.position = pd.Timestamp(debut) - self.freq   # dernier pas intégré
+        self.colonnes = None
+        self.sorties  = None   # (valeurs, index) définitifs
+
+        self.etapes = []
+        f = freq
+        if frequence != freq:
+            self.etapes.append(_Periode(f, frequence, 'mean', valides))
+            f = frequence
+        if sur is not None:
+            self.etapes.append(_Glissante(f, sur, valides))
+        if max_journalier:
+            self.etapes.append(_Periode(f, 'D', 'max', valides))
+            f = 'D'
+        if max_annuel:
+            self.etapes.append(_Periode(f, 'A', 'max', valides))
+            f = 'A'
+        self.freq_sortie = pd.tseries.frequencies.to_offset(f)
+
+    def _grille(self, df):
+        """Lignes de df postérieures à la position, sur la grille freq"""
+        if self.colonnes is None:
+            self.colonnes = list(df.columns)
+        df = df.reindex(columns=self.colonnes)
+        df = df[df.index > self.position]
+        if not len(df.index):
+            return _vide(len(self.colonnes))
+        index = pd.date_range(self.position + self.freq, df.index[-1], freq=self.freq)
+        return np.asarray(df.reindex(index).values, dtype=np.float64), index
+
+    def ajoute(self, df):
+        """Intègre les lignes de df postérieures au dernier pas intégré"""
+        valeurs, index = self._grille(df)
+        if not len(index):
+            return
+        self.position = index[-1]
+        for etape in self.etapes:
+            valeurs, index = etape.ajoute(valeurs, index)
+        self.sorties = _suite([self.sorties or (valeurs[:0], index[:0]), (valeurs, index)],
+                              self.freq_sortie)
+
+    def resultat(self, recents=None):
+        """Valeurs (DataFrame) définitives, complétées par les agrégats
+        provisoires des lignes recents (DataFrame non intégré)"""
+        if recents is not None:
+            valeurs, index = self._grille(recents)
+        else:
+            valeurs, index = _vide(len(self.colonnes or []))
+        k = len(self.colonnes or [])
+        for etape in self.etapes:
+            valeurs, index = etape.apercu(valeurs, index)
+        valeurs, index = _suite([self.sorties or _vide(k), (valeurs, index)],
+                                self.freq_sortie) or _vide(k)
+        return pd.DataFrame(valeurs, index=index, columns=self.colonnes)
+
+
+def agrege(xr, mes, debut, fin, freq='H', frequence='H', sur=None, max_journalier=False,
+           max_annuel=False, valides=0.75, dossier=None):
+    """Comme agregats.agrege(xr.get_mesures(mes, debut, fin, freq), ...)[0],
+    à partir de l'état conservé dans dossier (DOSSIER par défaut) : seules
+    les lignes postérieures à la dernière exécution sont extraites"""
+    dossier = dossier or DOSSIER
+    params = [sorted(liste(mes)), jour(debut), freq, frequence, sur,
+              bool(max_journalier), bool(max_annuel), valides]
+    chemin = os.path.join(dossier, empreinte.donnees(params) + '.pkl')   # indépendant du style
+    dernier = jour(fin) + JOUR - pd.tseries.frequencies.to_offset(freq)
+
+    if os.path.exists(chemin):
+        etat = pd.read_pickle(chemin)
+    else:
+        etat = Incremental(debut, freq, frequence, sur, max_journalier, max_annuel, valides)
+    if etat.position > dernier:
+        # Figure antérieure à l'état : calcul complet
+        df = xr.get_mesures(mes, debut=debut, fin=fin, freq=freq)
+        return agregats.agrege(df, freq, frequence, sur, max_journalier, max_annuel, valides)[0]
+    if etat.position == dernier:
+        return etat.resultat()   # période close, déjà intégrée
+
+    df = xr.get_mesures(mes, debut=jour(etat.position + etat.freq).strftime(FORMAT),
+                        fin=fin, freq=freq)
+    limite = min(dernier, pd.Timestamp(datetime.datetime.now()) - RECUL)
+    etat.ajoute(df[df.index <= limite])
+
+    if not os.path.isdir(dossier):
+        os.makedirs(dossier)
+    pd.to_pickle(etat, chemin)
+    return etat.resultat(df[df.index > limite])
@@ -0,0 +1,258 @@
+# -*- coding: UTF-8 -*-
+#Nom :  : ma.py
+#Description    : Figures standardisées - Mesures automatiques (analyseurs)
+#Copyright  : 2015, LIMAIR
+
+from __future__ import print_function
+
+from pyair_fig import chrono
+from pyair_fig import decimation
+from pyair_fig import empreinte
+from pyair_fig import incremental
+from pyair_fig import seuils
+from pyair_fig import sortie
+from pyair_fig import stats
+from pyair_fig import style
+from pyair_fig.collecteur import Collecteur
+from pyair_fig.serie import Serie
+
+###################################################################
+
+"""Définition des polluants - Mesures automatiques (analyseurs)"""
+class Polluant():
+    def __init__(self, nom, freq):
+        self.nom    = nom
+        self.freq = freq
+    def get_nom(self):
+        return self.nom
+    def get_freq(self):
+        return self.freq
+
+NO2    = Polluant('NO2','H')
+O3     = Polluant('O3','H')
+SO2    = Polluant('SO2','H')
+PM10   = Polluant('PM10','H')
+PM10NC = Polluant('PM10NC','H')
+PM25   = Polluant('PM25','H')
+CO     = Polluant('CO','H')
+TRS    = Polluant('TRS','H')
+H2S    = Polluant('H2S','15T')
+
+FAMILLES = dict((p.get_nom(), p) for p in [NO2, O3, SO2, PM10, PM10NC, PM25, CO, TRS, H2S])
+
+COULEURS        = ['#ff0000',  #Rouge : C0 M100 J100 N0
+                   '#00ff00',  #Vert foncé : C1000 M0 J100 N0
+                   '#0033ff',  #Bleu foncé : C100 M80 J0 N0
+                   '#802600',  #Marron : C0 M70 J100 N50
+                   '#ff80ff',  #Rose clair : C0 M50 J0 N0
+                   '#ff8000',  #Orange : C0 M50 J100 No
+                   '#00ffff',  #Cyan : C100
+                   '#808080']  #Gris : Noir50
+
+# Paramètres d'une figure, mêmes noms que les variables du script pyair_fig-ma.py
+DEFAUTS = {
+    'polluants'      : [],       # [(famille, mesures)], famille : Polluant ou nom
+    'debut'          : None,
+    'fin'            : None,
+    'frequence'      : 'H',      # H,D,M,A
+    'mes_valides'    : 0.75,     # Critère : 75 % de mesures valide pour moyenner
+    'GLISSANT'       : False,
+    'sur'            : 8,        # X unités (QH, H, M, A)
+    'MAX_JOURNALIER' : False,
+    'MAX_ANNUEL'     : False,
+    'ALERTE'         : False,
+    'Valeur_lim'     : False,
+    'Obj_qual'       : False,
+    'Oms'            : False,
+    'figname'        : None,
+    'size'           : 'L',      # L : Large , S : Small
+    'MARKERSIZE'     : 2,        # Taille des points
+    'COL'            : 2,        # Nombre de colonne dans la légende
+    'maxi'           : None,     # max de l'échelle, optionnel. Si = None, calculé auto
+    'DECIMATION'     : None,     # None, 'minmax' ou 'lttb' : points réduits à la largeur de la figure
+    'SORTIES'        : ('png',), # formats écrits : png, pdf, svg, web (voir sortie.py)
+    'FORCE'          : False,    # True : figure redessinée même si données et paramètres inchangés
+    'INCREMENTAL'    : False,    # True : agrégats repris de l'exécution précédente (voir incremental.py)
+    'stat'           : False}
+
+
+def spec(**params):
+    """Paramètres complets d'une figure (DEFAUTS complétés par params)"""
+    inconnus = set(params) - set(DEFAUTS)
+    if inconnus:
+        raise ValueError(u"Paramètre(s) inconnu(s) : %s" % ', '.join(sorted(inconnus)))
+    s = dict(DEFAUTS)
+    s.update(params)
+    s['polluants'] = [(famille(f), mesures) for f, mesures in s['polluants']]
+    return s
+
+
+def famille(f):
+    if isinstance(f, Polluant):
+        return f
+    if f not in FAMILLES:
+        raise ValueError("Famille de polluant inconnue : %s (%s)" % (f, ', '.join(sorted(FAMILLES))))
+    return FAMILLES[f]
+
+
+def besoins(s):
+    """Extractions nécessaires à la figure : [(mesures, debut, fin, freq)]"""
+    return [(mesures, s['debut'], s['fin'], f.get_freq()) for f, mesures in s['polluants']]
+
+
+##################          Figure             ######################
+
+def figure(s, xr, index, gabarits=None):
+    """Génère la figure décrite par s (voir spec) ; xr fournit get_mesures,
+    index le code STATION de chaque mesure (stations.IndexMesures),
+    gabarits les figures stylées réutilisables (dict {size: style.Gabarit})"""
+    with chrono.figure(s['figname']):
+        series = calcule(s, xr)
+        labels = libelles(series, index)
+        cle = cle_figure(s, series, labels)
+        if a_jour(s, cle):
+            return s['figname']
+        trace(s, series, labels, gabarits)
+        empreinte.enregistre(s['figname'], cle)
+    return s['figname']
+
+
+def cle_figure(s, series, labels):
+    """Empreinte de la figure : paramètres, légendes, séries et seuils"""
+    params = dict((k, v) for k, v in s.items() if k not in ('stat', 'FORCE'))
+    return empreinte.calcule(params, labels, series, seuils.TABLE)
+
+
+def a_jour(s, cle):
+    """True si la figure existe déjà avec la même empreinte (sauf FORCE)"""
+    if s['FORCE'] == True:
+        return False
+    return empreinte.a_jour(s['figname'], cle, sortie.fichiers(s['figname'], s['SORTIES']).values())
+
+
+def calcule(s, xr):
+    """Extraction et agrégation : [(nom, df)] par famille de polluant"""
+    series = []
+    tables = []   # statistiques réglementaires (stat == True)
+    for famille, polluant in s['polluants']:
+        nom  = famille.get_nom()
+        freq = famille.get_freq()
+
+        # Moyenne au pas frequence, moyenne glissante et max journalier/annuel,
+        # critère de mes_valides (75 %) à chaque étape
+        chaine = dict(sur            = s['sur'] if s['GLISSANT'] == True else None,
+                      max_journalier = s['MAX_JOURNALIER'] == True,
+                      max_annuel     = s['MAX_ANNUEL'] == True,
+                      valides        = s['mes_valides'])
+        if s['INCREMENTAL'] == True:
+            # extraction des seules lignes nouvelles comprise
+            with chrono.etape('agregation') as e:
+                df = incremental.agrege(xr, polluant, s['debut'], s['fin'], freq, s['frequence'], **chaine)
+                e.lignes = len(df.index)
+        else:
+            # Grille float32 et masque de validité (voir serie.py), calculs
+            # une colonne à la fois
+            with chrono.etape('extraction') as e:
+                df = xr.get_mesures(mes = polluant, debut = s['debut'], fin = s['fin'], freq = freq)
+                e.lignes = len(df.index)
+                serie = Serie.depuis(df, freq)
+            if s['stat'] == True:
+                # Dépassements, percentiles et taux de saisie sur les données
+                # brutes déjà extraites (voir stats.py)
+                with chrono.etape('statistiques') as e:
+                    tables.append(stats.calcule(nom, serie, freq, s['debut'], s['fin'],
+                                                s['mes_valides']))
+                    e.lignes = len(serie)
+            with chrono.etape('agregation') as e:
+                serie = serie.agrege(freq, s['frequence'], **chaine)
+                df = serie.frame()   # vue sur les valeurs de serie
+                e.lignes = len(df.index)
+
+        # Statistiques
+        if s['stat'] == True:
+            print('moyenne\n', df.mean(), '\n')
+            print('max\n', df.max(), '\n')
+            print('min\n', df.min())
+
+        # Suppression des valeurs négatives
+        with chrono.etape('validite') as e:
+            if s['INCREMENTAL'] == True:
+                df[df < 0] = 0
+            else:
+                serie.plancher(0)   # en place, df compris
+            e.lignes = len(df.index)
+        series.append((nom, df))
+
+    if tables:
+        print(stats.ecrit(s['figname'], tables).to_string())
+    elif s['stat'] == True and s['INCREMENTAL'] == True:
+        print("Statistiques réglementaires indisponibles en mode incrémental (données brutes non extraites)")
+    return series
+
+
+def libelles(series, index):
+    """Légende de chaque mesure : {mesure: 'Polluant - Station'}"""
+    labels = {}
+    for nom, df in series:
+        for mes in df.columns:
+            labels[mes] = "%s - %s" % (style.NOMS[nom], style.NOMS[index.station(mes)])
+    return labels
+
+
+def trace(s, series, labels, gabarits=None):
+    """Rendu de la figure (tracés, seuils, légende) et sauvegarde ; avec
+    gabarits, la figure stylée de même taille est réutilisée"""
+    size = s['size']
+    if gabarits is None:
+        style.init_mpl(size)
+        fig, ax = style.new_fig(size, COULEURS)
+    else:
+        fig, ax = style.gabarit(gabarits, size, COULEURS).prepare()
+    tmp     = Collecteur()  # statistiques pour le calcul du max(échelle)
+
+    # Plot (séries longues réduites aux colonnes de pixels si DECIMATION)
+    with chrono.etape('trace') as e:
+        methode = s['DECIMATION']
+        e.lignes = 0
+        for nom, df in series:
+            for mes, val in df.iteritems():
+                if methode:
+                    val = decimation.reduit(val, decimation.colonnes(size), methode)
+                e.lignes += len(val.index)
+                val.plot(ax = ax,
+                        label           = labels[mes],
+                        linestyle       = '-',
+                        linewidth       = style.LINEWIDTH,
+                        marker          = 'o',
+                        markeredgewidth = 0,
+                        markersize      = s['MARKERSIZE'],
+                        clip_on         = False)
+
+            # Sauvegarde pour calculer le max de l'échelle de concentration
+            tmp.ajoute(df)
+
+    #Echelle
+    maxi = s['maxi']
+    if maxi == None:
+        maxi = style.echelle(tmp.max)
+    ax.set_ylim(ymin = 0, ymax = maxi)
+
+    unit = style.unite(nom)
+
+    # Seuils
+    with chrono.etape('seuils'):
+        seuils.trace(ax, nom, seuils.actifs(nom,
+                                            alerte     = s['ALERTE'] == True,
+                                            valeur_lim = s['Valeur_lim'] == True,
+                                            obj_qual   = s['Obj_qual'] == True,
+                                            oms        = s['Oms'] == True),
+                     maxi, unit)
+
+    # Taille axes, unité, grille, légende
+    with chrono.etape('legende'):
+        style.finalise(fig, ax, size, unit, s['COL'])
+
+    # Cloture
+    with chrono.etape('sauvegarde'):
+        sortie.sauve(fig, s['figname'], s['SORTIES'], fermer = gabarits is None)
+    return s['figname']
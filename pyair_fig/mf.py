@@ -0,0 +1,220 @@
+# -*- coding: UTF-8 -*-
+#Nom :  : mf.py
+#Description    : Figures météo standardisées (base Météo-France)
+#Copyright  : 2015, LIMAIR
+
+from __future__ import print_function
+
+import numpy as np
+
+from pyair_fig import chrono
+from pyair_fig import empreinte
+from pyair_fig import sortie
+from pyair_fig import style
+from pyair_fig.collecteur import Collecteur
+
+#################  Paramétrage de Matplotlib   ####################
+
+NOMS = {
+    "T": u"Température (°C)",
+    "U":u"Humidité relative (%)",
+    "RR1":u"Hauteur de précipitations (mm)",
+    "cumul":u"Cumul de précipitations (mm)"}
+
+COULEURS = {"T"    : '#ff0000',  #Rouge : C0 M100 J100 N0
+            "RR1"  : '#0033ff',  #Bleu foncé : C100 M80 J0 N0
+            "U"    : '#00ff00',  #Vert foncé : C1000 M0 J100 N0
+            "cumul": '#00ffff'}  #Marron : C0 M70 J100 N50
+
+# Différences avec le paramétrage commun (style)
+AXE           = {'L':[0.12, 0.2, 0.85, 0.62],'S':[0.12, 0.25, 0.85, 0.54]} #  L [Xmin, Ymin, Xmax, Ymax]
+XFONTSIZE     = {'L':5.8,'S':4.8}
+LEGFONTSIZE   = {'L':5.5,'S':4.5}
+LEGMARKERSCALE = 1.5
+PALIERS       = (300, 200, 100, 50, 30, 10, 1)   # max de l'échelle
+
+# Paramètres d'une figure, mêmes noms que les variables du script pyair_fig-mf.py
+DEFAUTS = {
+    'station'      : 'LIMOGES-BELLEGARDE',
+    'parametres'   : ['T'],    # variables(s) à tracer : T, U, RR1
+    'debut'        : '2015-06-28',
+    'fin'          : '2015-06-30',
+    'cumul_precip' : False,    # Activation du cumul des précipitations
+    'stat'         : False,
+    'figname'      : 'limoges',
+    'size'         : 'L',      # L : Large , S : Small
+    'MARKERSIZE'   : 2,        # Taille des points
+    'COL'          : 3,        # Nombre de colonne dans la légende
+    'SORTIES'      : ('png',), # formats écrits : png, pdf, svg, web (voir sortie.py)
+    'FORCE'        : False}    # True : figure redessinée même si données et paramètres inchangés
+
+
+def spec(**params):
+    """Paramètres complets d'une figure (DEFAUTS complétés par params)"""
+    inconnus = set(params) - set(DEFAUTS)
+    if inconnus:
+        raise ValueError(u"Paramètre(s) inconnu(s) : %s" % ', '.join(sorted(inconnus)))
+    s = dict(DEFAUTS)
+    s.update(params)
+    if s['cumul_precip'] == True and 'RR1' not in s['parametres']:
+        raise ValueError(u"cumul_precip demande le paramètre RR1")
+    for p in s['parametres']:
+        if p not in NOMS:
+            raise ValueError(u"Paramètre météo inconnu : %s" % p)
+    return s
+
+
+class Donnees(object):
+    """Extractions Météo-France partagées entre figures : une seule requête
+    par station, sur l'union des paramètres et des périodes du lot"""
+
+    def __init__(self, mf, specs=()):
+        self.mf       = mf
+        self.besoins  = {}   # station : (parametres, debut, fin)
+        self.extraits = {}
+        for s in specs:
+            self.ajoute(s)
+
+    def ajoute(self, s):
+        parametres, debut, fin = self.besoins.get(s['station'], ([], s['debut'], s['fin']))
+        parametres = parametres + [p for p in s['parametres'] if p not in parametres]
+        self.besoins[s['station']] = (parametres, min(debut, s['debut']), max(fin, s['fin']))
+
+    def get_mesures(self, s):
+        station = s['station']
+        if station not in self.besoins:
+            self.ajoute(s)
+        if station not in self.extraits:
+            parametres, debut, fin = self.besoins[station]
+            with chrono.etape('extraction') as e:
+                df = self.mf.get_mesures(station,
+                                         parametres = parametres,
+                                         debut = debut,
+                                         fin = fin)
+                e.lignes = len(df.index)
+            with chrono.etape('reechantillonnage') as e:
+                self.extraits[station] = df.resample('H', how = 'mean')
+                e.lignes = len(self.extraits[station].index)
+        df = self.extraits[station]
+        return df[s['parametres']].truncate(before = s['debut'],
+                                            after = s['fin'] + ' 23:59:59').copy()
+
+
+##################          Figure             ######################
+
+def execute(figures, mf):
+    """Génère les figures (dicts de paramètres, voir spec) avec le client
+    Météo-France mf ; une extraction par station pour tout le lot"""
+    specs = [spec(**f) for f in figures]
+    donnees = Donnees(mf, specs)
+    return [figure(s, donnees) for s in specs]
+
+
+def figure(s, donnees):
+    """Génère la figure décrite par s (voir spec) ; donnees : Donnees ou
+    client Météo-France"""
+    if not isinstance(donnees, Donnees):
+        donnees = Donnees(donnees)
+    with chrono.figure(s['figname']):
+        df = calcule(s, donnees)
+        cle = cle_figure(s, df)
+        if a_jour(s, cle):
+            return s['figname']
+        trace(s, df)
+        empreinte.enregistre(s['figname'], cle)
+    return s['figname']
+
+
+def cle_figure(s, df):
+    """Empreinte de la figure : paramètres, données et paramétrage météo"""
+    params = dict((k, v) for k, v in s.items() if k not in ('stat', 'FORCE'))
+    return empreinte.calcule(params, df, [AXE, XFONTSIZE, LEGFONTSIZE, LEGMARKERSCALE])
+
+
+def a_jour(s, cle):
+    """True si la figure existe déjà avec la même empreinte (sauf FORCE)"""
+    if s['FORCE'] == True:
+        return False
+    return empreinte.a_jour(s['figname'], cle, sortie.fichiers(s['figname'], s['SORTIES']).values())
+
+
+def calcule(s, donnees):
+    """Données horaires de la figure (cumul des précipitations éventuel)"""
+    df = donnees.get_mesures(s)
+
+    if s['cumul_precip'] == True:
+        df['cumul']=np.cumsum(df['RR1'])
+
+    # Statistiques
+    if s['stat'] == True:
+        print('moyenne\n', df.mean(), '\n')
+        print('max\n', df.max(), '\n')
+        print('min\n', df.min(), '\n')
+        if 'RR1' in s['parametres']:
+            print('cumul de précipitations :\n', df['RR1'].sum())
+    return df
+
+
+def trace(s, df):
+    """Rendu de la figure et sauvegarde"""
+    size = s['size']
+    style.init_mpl(size)
+    style.mpl.rcParams['xtick.labelsize']    = XFONTSIZE[size]
+    style.mpl.rcParams['ytick.labelsize']    = XFONTSIZE[size]
+    style.mpl.rcParams['legend.markerscale'] = LEGMARKERSCALE
+    fig, ax = style.new_fig(size)
+    ax.set_position(AXE[size])
+    tmp     = Collecteur()  # statistiques pour le calcul du max(échelle)
+
+    with chrono.etape('trace') as e:
+        e.lignes = len(df.index) * len(df.columns)
+        for parametre, data in df.iteritems():
+            label   = NOMS[parametre] + ' / ' + s['station']
+            data.plot(ax = ax,
+                    label           = label,
+                    color           = COULEURS[parametre],
+                    linestyle       = '-',
+                    linewidth       = style.LINEWIDTH,
+                    marker          = 'o',
+                    markeredgewidth = 0,
+                    markersize      = s['MARKERSIZE'],
+                    clip_on         = False)
+
+            #Sauvegarde pour calculer le max de l'échelle de concentration
+            tmp.ajoute(data)
+
+    # Echelle
+    min = tmp.min
+    if min < -5:
+        ax.set_ylim(ymin = -10)
+    elif min < 0:
+        ax.set_ylim(ymin = -5)
+    else:
+        ax.set_ylim(ymin = 0)
+    ax.set_ylim(ymax = style.echelle(tmp.max, PALIERS))
+
+    with chrono.etape('legende'):
+        # Grille
+        ax.xaxis.grid(False, which = 'both')
+        ax.yaxis.grid(True, which = 'both', color = 'darkgrey')
+        ax.set_xlabel('')
+        ax.set_ylabel('')
+
+        # Taille axes
+        for tick in ax.xaxis.get_major_ticks():
+            tick.label.set_fontsize(XFONTSIZE[size])
+        for tick in ax.yaxis.get_major_ticks():
+            tick.label.set_fontsize(XFONTSIZE[size])
+
+        # Légende
+        leg = ax.legend(bbox_to_anchor = (-0.075, 1.08, 1., .10),
+                        loc  = 3,
+                        ncol = s['COL'],
+                        mode = None,
+                        fontsize = LEGFONTSIZE[size])
+        leg.draw_frame(False)
+
+    # Cloture
+    with chrono.etape('sauvegarde'):
+        sortie.sauve(fig, s['figname'], s['SORTIES'])
+    return s['figname']
@@ -0,0 +1,106 @@
+# -*- coding: UTF-8 -*-
+#Nom :  : parallele.py
+#Description    : Rendu d'un lot de figures réparti sur plusieurs processus
+#Copyright  : 2015, LIMAIR
+
+"""Rendu parallèle d'un lot de figures.
+
+Les extractions et agrégations sont faites une fois dans le processus
+principal (comme batch.execute), puis toutes les séries sont copiées dans
+deux tableaux en mémoire partagée (valeurs et dates) transmis aux processus
+à leur création. Un travail ne contient plus que les paramètres de la
+figure, les légendes et la position de ses séries dans ces tableaux ; le
+rendu (ma.trace : new_fig, tracés, seuils, légende, savefig) est fait par
+le processus, qui relit ses séries sans copie. Les figures déjà à jour
+(même empreinte, voir empreinte.py) ne sont pas envoyées aux processus.
+"""
+
+import ctypes
+import multiprocessing
+from multiprocessing.sharedctypes import RawArray
+
+import numpy as np
+import pandas as pd
+
+from pyair_fig import batch
+from pyair_fig import chrono
+from pyair_fig import empreinte
+from pyair_fig import ma
+from pyair_fig import style
+
+VALEURS  = None   # mémoire partagée des processus de rendu
+DATES    = None
+GABARITS = {}     # figures stylées du processus, par taille
+
+
+def execute(figures, xr, index, processus=None):
+    """Comme batch.execute, rendu réparti sur processus processus
+    (None : un par cœur) ; renvoie la liste des figures"""
+    specs = [ma.spec(**f) for f in figures]
+    donnees = batch.Donnees(xr)
+    donnees.prepare([b for s in specs for b in ma.besoins(s)])
+
+    travaux, cles, blocs = [], [], []
+    nval = ndate = 0
+    for s in specs:
+        with chrono.figure(s['figname']):
+            series = ma.calcule(s, donnees)
+            labels = ma.libelles(series, index)
+            cle = ma.cle_figure(s, series, labels)
+        if ma.a_jour(s, cle):
+            continue
+        cles.append((s['figname'], cle))
+        places = []
+        for nom, df in series:
+            n, k = df.shape
+            places.append((nom, nval, ndate, n, list(df.columns), df.index.freqstr))
+            blocs.append((nval, ndate, df))
+            nval  += n * k
+            ndate += n
+        travaux.append((s, places, labels))
+
+    valeurs = RawArray(ctypes.c_double, max(nval, 1))
+    dates   = RawArray(ctypes.c_int64, max(ndate, 1))
+    vals = np.frombuffer(valeurs, dtype=np.float64)
+    dats = np.frombuffer(dates, dtype=np.int64)
+    for pv, pt, df in blocs:
+        n, k = df.shape
+        vals[pv:pv + n * k] = df.values.astype(np.float64).ravel()
+        dats[pt:pt + n]   = df.index.asi8
+    del blocs
+
+    if travaux:
+        pool = multiprocessing.Pool(processus, initializer=_init, initargs=(valeurs, dates))
+        try:
+            for releves in pool.map(_trace, travaux, chunksize=1):
+                chrono.ajoute(releves)
+        finally:
+            pool.close()
+            pool.join()
+    for figname, cle in cles:
+        empreinte.enregistre(figname, cle)
+    return [s['figname'] for s in specs]
+
+
+def _init(valeurs, dates):
+    """Préparation d'un processus : mémoire partagée, rcParams, gabarits"""
+    global VALEURS, DATES
+    VALEURS = np.frombuffer(valeurs, dtype=np.float64)
+    DATES   = np.frombuffer(dates, dtype=np.int64)
+    for size in ('S', 'L'):
+        fig = style.gabarit(GABARITS, size, ma.COULEURS).fig
+        fig.canvas.draw()   # chargement des polices et du rendu Agg
+
+
+def _trace(travail):
+    """Rendu d'une figure ; renvoie les relevés de chrono à conserver par
+    le processus principal (format prometheus)"""
+    s, places, labels = travail
+    with chrono.figure(s['figname']):
+        series = []
+        for nom, pv, pt, n, colonnes, freq in places:
+            valeurs = VALEURS[pv:pv + n * len(colonnes)].reshape(n, len(colonnes))
+            index   = pd.DatetimeIndex(DATES[pt:pt + n].view('M8[ns]'), freq=freq)
+            series.append((nom, pd.DataFrame(valeurs, index=index, columns=colonnes, copy=False)))
+        ma.trace(s, series, labels, GABARITS)
+    return chrono.extrait()
@@ -0,0 +1,72 @@
+# -*- coding: UTF-8 -*-
+#Nom :  : raccord.py
+#Description    : Raccord de séries mesurées successivement par plusieurs mesures (changement d'analyseur)
+#Copyright  : 2015, LIMAIR
+
+"""Raccord de séries.
+
+Quand une mesure en remplace une autre (PM10 non corrigés jusqu'en 2006
+puis PM10 corrigés, changement d'analyseur ou de code), la série d'une
+station est décrite par des segments successifs
+    [(mesures, debut, fin), ...]
+(mesures : une mesure ou une liste, même nombre et même ordre de station
+dans chaque segment). Chaque segment n'est extrait que sur sa propre
+période, toutes les extractions simultanément (PoolXAIR), et les
+résultats sont écrits à leur place dans un seul tableau préalloué :
+colonnes = mesures du dernier segment.
+"""
+
+import numpy as np
+import pandas as pd
+
+from pyair_fig import extraction
+from pyair_fig.cache import jour, liste, JOUR
+
+
+def segments(anciennes, mesures, bascule, debut, fin):
+    """Segments d'un changement de mesure à la date bascule : anciennes
+    jusqu'à la veille, mesures ensuite (un seul segment si la période ne
+    contient pas la bascule)"""
+    bascule = jour(bascule)
+    if jour(fin) < bascule:
+        return [(anciennes, debut, fin)]
+    if jour(debut) >= bascule:
+        return [(mesures, debut, fin)]
+    veille = (bascule - JOUR).strftime('%Y-%m-%d')
+    return [(anciennes, debut, veille), (mesures, bascule.strftime('%Y-%m-%d'), fin)]
+
+
+def assemble(segments, resultats, index=None):
+    """DataFrame unique des resultats (un DataFrame par segment, colonnes
+    dans l'ordre des mesures du segment) : chaque résultat est limité à la
+    période de son segment et écrit à sa place. index : index commun
+    (défaut : réunion des index des résultats)"""
+    if index is None:
+        index = resultats[0].index
+        for df in resultats[1:]:
+            index = index.union(df.index)
+    colonnes = liste(segments[-1][0])
+    valeurs = np.full((len(index), len(colonnes)), np.nan)
+    for (mesures, debut, fin), df in zip(segments, resultats):
+        if df.shape[1] != len(colonnes):
+            raise ValueError("Segments de tailles différentes : %s / %s" % (liste(mesures), colonnes))
+        dans = (df.index >= jour(debut)) & (df.index < jour(fin) + JOUR)
+        lignes = index.get_indexer(df.index[dans])
+        garde = lignes >= 0
+        valeurs[lignes[garde]] = np.asarray(df.values[dans], dtype=np.float64)[garde]
+    return pd.DataFrame(valeurs, index=index, columns=colonnes, copy=False)
+
+
+def requetes(segments, freq='H'):
+    """Requêtes [(mes, debut, fin, freq)] des segments"""
+    return [(mesures, debut, fin, freq) for mesures, debut, fin in segments]
+
+
+def extrait(xr, segments, freq='H'):
+    """Série raccordée des segments, au pas freq, de la date de début du
+    premier segment à la fin du dernier ; extractions simultanées si xr
+    est un PoolXAIR"""
+    resultats = extraction.extrait(xr, requetes(segments, freq))
+    index = pd.date_range(jour(segments[0][1]), jour(segments[-1][2]) + JOUR, freq=freq,
+                          closed='left')
+    return assemble(segments, resultats, index)
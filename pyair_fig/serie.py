@@ -0,0 +1,131 @@
+# -*- coding: UTF-8 -*-
+#Nom :  : serie.py
+#Description    : Séries de mesures compactes (float32 par colonne, masque de validité)
+#Copyright  : 2015, LIMAIR
+
+"""Séries de mesures compactes.
+
+Les extractions XAIR arrivent en float64 ; pour les historiques longs sur
+tout le parc, la grille régulière, les moyennes, la moyenne glissante et
+la suppression des valeurs négatives en gardaient plusieurs copies
+complètes. Serie garde les valeurs en float32 (largement suffisant pour
+des µg/m³), une colonne contiguë par mesure (ordre Fortran), sur un index
+régulier partagé, avec un masque de validité booléen au lieu de NaN :
+    - depuis() remplit la grille colonne par colonne, sans copie float64
+      complète ;
+    - les agrégats (agregats.glissante, agregats.par_periode) sont
+      calculés une colonne à la fois : les tableaux intermédiaires en
+      float64 ne dépassent pas une colonne ;
+    - plancher() et fenetre() travaillent en place ou par vue ;
+    - frame() rend un DataFrame qui partage les valeurs (NaN écrits dans
+      les cases invalides, sans copie).
+"""
+
+import numpy as np
+import pandas as pd
+
+from pyair_fig import agregats
+
+DTYPE = np.float32
+
+
+class Serie(object):
+    """Mesures (temps x colonnes) : valeurs float32 (ordre Fortran),
+    valides (masque booléen de même forme), index régulier"""
+
+    def __init__(self, valeurs, valides, index, colonnes):
+        self.valeurs  = valeurs
+        self.valides  = valides
+        self.index    = index
+        self.colonnes = list(colonnes)
+
+    @classmethod
+    def vide(cls, index, colonnes):
+        forme = (len(index), len(colonnes))
+        return cls(np.zeros(forme, dtype=DTYPE, order='F'),
+                   np.zeros(forme, dtype=bool, order='F'), index, colonnes)
+
+    @classmethod
+    def depuis(cls, df, freq):
+        """Serie des colonnes de df sur la grille régulière au pas freq"""
+        if len(df.index) == 0:
+            return cls.vide(pd.DatetimeIndex([], freq=freq), df.columns)
+        index = pd.date_range(df.index[0], df.index[-1], freq=freq)
+        res = cls.vide(index, df.columns)
+        lignes = index.get_indexer(df.index)
+        garde  = lignes >= 0
+        lignes = lignes[garde]
+        for j in range(len(res.colonnes)):
+            col = np.asarray(df.iloc[:, j].values)[garde]
+            ok  = ~np.isnan(col)
+            res.valeurs[lignes[ok], j] = col[ok]
+            res.valides[lignes[ok], j] = True
+        return res
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def nbytes(self):
+        return self.valeurs.nbytes + self.valides.nbytes
+
+    def colonne(self, j):
+        """Valeurs de la colonne j en float64, NaN si invalide (une colonne)"""
+        return np.where(self.valides[:, j], self.valeurs[:, j], np.nan)
+
+    def fenetre(self, debut=None, fin=None):
+        """Vue sur les lignes entre debut et fin (inclus)"""
+        d = 0 if debut is None else self.index.searchsorted(pd.Timestamp(debut))
+        f = len(self.index) if fin is None else self.index.searchsorted(pd.Timestamp(fin), side='right')
+        return Serie(self.valeurs[d:f], self.valides[d:f], self.index[d:f], self.colonnes)
+
+    def plancher(self, mini=0):
+        """Valeurs inférieures à mini ramenées à mini (en place)"""
+        np.maximum(self.valeurs, mini, out=self.valeurs)
+        return self
+
+    def _par_colonne(self, index, calcul):
+        """Serie de calcul(colonne) pour chaque colonne ; calcul reçoit et
+        rend un tableau (n, 1) float64 avec NaN"""
+        res = Serie.vide(index, self.colonnes)
+        for j in range(len(self.colonnes)):
+            valeurs = calcul(self.colonne(j)[:, np.newaxis])[:, 0]
+            ok = ~np.isnan(valeurs)
+            res.valeurs[:, j] = np.where(ok, valeurs, 0)
+            res.valides[:, j] = ok
+        return res
+
+    def glissante(self, sur, valides=0.75):
+        """Moyenne glissante sur sur pas (voir agregats.glissante)"""
+        return self._par_colonne(self.index,
+                                 lambda v: agregats.glissante(v, sur, valides)[0])
+
+    def par_periode(self, regle, how='mean', valides=0.75):
+        """Moyenne ou max par période regle (voir agregats.par_periode)"""
+        if not len(self.index):
+            return self
+        dates = agregats.periodes(self.index, regle)[1]
+        return self._par_colonne(dates,
+                                 lambda v: agregats.par_periode(v, self.index, regle, how, valides)[0])
+
+    def agrege(self, freq, frequence='H', sur=None, max_journalier=False, max_annuel=False,
+               valides=0.75):
+        """Chaîne de agregats.agrege, une colonne à la fois"""
+        serie = self
+        if frequence != freq:
+            serie = serie.par_periode(frequence, 'mean', valides)
+        if sur is not None:
+            serie = serie.glissante(sur, valides)
+        if max_journalier:
+            serie = serie.par_periode('D', 'max', valides)
+        if max_annuel:
+            serie = serie.par_periode('A', 'max', valides)
+        return serie
+
+    def frame(self):
+        """DataFrame (float32) partageant les valeurs ; les cases invalides
+        reçoivent NaN"""
+        for j in range(len(self.colonnes)):
+            colonne = self.valeurs[:, j]
+            colonne[~self.valides[:, j]] = np.nan
+        return pd.DataFrame(self.valeurs, index=self.index, columns=self.colonnes, copy=False)
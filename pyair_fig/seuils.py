@@ -0,0 +1,92 @@
+# -*- coding: UTF-8 -*-
+#Nom :  : seuils.py
+#Description    : Seuils d'alerte et valeurs réglementaires des figures
+#Copyright  : 2015, LIMAIR
+
+"""Seuils d'alerte et valeurs réglementaires.
+
+Les valeurs sont rangées dans une table polluant x seuil (TABLE) ; chaque
+seuil actif est tracé par une droite horizontale (axhline, deux points)
+au lieu d'une colonne constante de la longueur des données.
+"""
+
+import numpy as np
+import pandas as pd
+
+from pyair_fig import style
+
+"""Seuils d'alerte NO2, SO2, O3 et PM10 et Valeurs réglementaires"""
+MVR     = {'NO2':135, 'SO2':200, 'O3':150, 'PM10':-999, 'PM10NC':-999}
+IR      = {'NO2':200, 'SO2':300, 'O3':180, 'PM10':50,   'PM10NC':50}
+A       = {'NO2':400, 'SO2':500, 'O3':240, 'PM10':80,   'PM10NC':80}
+VL      = {'NO2':40,'O3':120,'PM10':40,'PM25':25,'CO':10}
+OQ      = {'NO2':40,'PM10':30,'PM25':10,}
+OMS     = {'NO2':40,'O3':100,'PM10':20,'PM25':10,'H2S':7}
+
+SEUILS  =  {'MVR':u"Seuil de mise en vigilance régionale",
+            'IR' :u"Seuil d'information et de recommandations",
+            'A'  :u"Seuil d'alerte",
+            'OMS':u'Seuil de gêne olfactive (OMS) sur 30 min',
+            'VC' :u'Valeur cible annuelle',
+            'VL' :u'Valeur limite annuelle',
+            'OQ' :u'Objectif de qualité annuel',
+            'OMS':u'Valeur guide OMS'}
+
+COULEURS_VR = {'MVR':'#ff0000',  #Rouge
+               'IR' :'#cc0000',  #Strong red +
+               'A'  :'#6a0000',  #Very dark red
+               'VL' :'#ffa500',  #Orange
+               'OQ' :'#cc0000',  #Strong red
+               'OMS':'#800000',  #Marron
+               'VTR':'#ff0000'}  #Strong red
+
+ORDRE = ['MVR', 'IR', 'A', 'VL', 'OQ', 'OMS']   # ordre des seuils dans la légende
+
+
+def table(**valeurs):
+    """Table polluant x seuil à partir de dicts {polluant: valeur} ;
+    les valeurs négatives (-999 : sans objet) sont absentes (NaN)"""
+    t = pd.DataFrame(valeurs, dtype=float)
+    t = t[[c for c in ORDRE if c in t.columns] + [c for c in t.columns if c not in ORDRE]]
+    return t.where(t >= 0)
+
+TABLE = table(MVR=MVR, IR=IR, A=A, VL=VL, OQ=OQ, OMS=OMS)
+
+
+def actifs(nom, alerte=False, valeur_lim=False, obj_qual=False, oms=False):
+    """Seuils demandés par les options ALERTE, Valeur_lim, Obj_qual et Oms
+    des scripts (pas d'objectif de qualité ni de valeur OMS pour le CO)"""
+    codes = []
+    if alerte:
+        codes += ['MVR', 'IR', 'A']
+    if valeur_lim:
+        codes.append('VL')
+    if obj_qual and nom != 'CO':
+        codes.append('OQ')
+    if oms and nom != 'CO':
+        codes.append('OMS')
+    return codes
+
+
+def valeurs(nom, codes, table=TABLE):
+    """[(seuil, valeur)] des seuils codes définis pour le polluant nom"""
+    if nom not in table.index:
+        return []
+    ligne = table.loc[nom]
+    return [(code, ligne[code]) for code in codes
+            if code in ligne.index and not np.isnan(ligne[code])]
+
+
+def trace(ax, nom, codes, maxi, unit, table=TABLE):
+    """Une droite horizontale par seuil actif, avec son libellé de légende"""
+    lignes = []
+    for code, valeur in valeurs(nom, codes, table):
+        if valeur <= maxi or valeur + 10 >= maxi:
+            label = SEUILS[code] + ' (%i' % valeur + ' ' + unit + ")"
+            lignes.append(ax.axhline(valeur,
+                                     label     = label,
+                                     linestyle = '-',
+                                     linewidth = style.LINEWIDTH + 0.5,
+                                     color     = COULEURS_VR[code],
+                                     clip_on   = False))
+    return lignes
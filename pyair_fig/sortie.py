@@ -0,0 +1,113 @@
+# -*- coding: UTF-8 -*-
+#Nom :  : sortie.py
+#Description    : Sauvegarde d'une figure en plusieurs formats (PNG, PDF, SVG, web)
+#Copyright  : 2015, LIMAIR
+
+"""Sorties des figures.
+
+Une figure rendue est écrite en une fois dans les formats demandés :
+    - 'png' : raster DPI (300) pour les rapports, comme style.sauve ;
+    - 'pdf', 'svg' : vectoriels ;
+    - 'web' : raster réduit à WEB_DPI, en WebP (PNG si WebP indisponible).
+Avec PIL (optionnel), la figure n'est rendue qu'une fois par Agg : le PNG
+et l'image web sont compressés à partir de ce rendu dans des threads,
+pendant l'écriture des formats vectoriels. Sans PIL, chaque format
+raster est écrit par savefig.
+"""
+
+from multiprocessing.pool import ThreadPool
+
+from pyair_fig import style
+
+Image = False   # PIL.Image (None si absent), importé à la première sortie
+
+
+def _image():
+    global Image
+    if Image is False:
+        try:
+            from PIL import Image as image
+            image.init()
+        except ImportError:
+            image = None
+        Image = image
+    return Image
+
+FORMATS  = ('png', 'pdf', 'svg', 'web')
+VECTEURS = ('pdf', 'svg')
+WEB_DPI  = 100
+
+
+def _web():
+    """Format et extension de l'image web"""
+    if _image() is not None and 'WEBP' in Image.SAVE:
+        return 'WEBP', 'webp'
+    return 'PNG', 'png'
+
+
+def fichiers(figname, formats):
+    """Chemins écrits pour les formats demandés : {format: chemin}"""
+    res = {}
+    for f in formats:
+        if f not in FORMATS:
+            raise ValueError("Format inconnu : %s (%s)" % (f, ', '.join(FORMATS)))
+        if f == 'web':
+            res[f] = style.DOSSIER + figname + '-web.' + _web()[1]
+        else:
+            res[f] = style.DOSSIER + figname + '.' + f
+    return res
+
+
+def _encode(image, chemin, format, dpi, echelle=1.):
+    if echelle != 1.:
+        filtre = getattr(Image, 'LANCZOS', None) or Image.ANTIALIAS
+        taille = (int(round(image.size[0] * echelle)), int(round(image.size[1] * echelle)))
+        image  = image.resize(taille, filtre)
+    if format == 'WEBP':
+        image.save(chemin, format, quality = 90, method = 4)
+    else:
+        image.save(chemin, format, dpi = (dpi, dpi), optimize = True)
+    return chemin
+
+
+def sauve(fig, figname, formats=('png',), fermer=True):
+    """Écrit la figure dans les formats demandés (voir FORMATS) ; renvoie
+    {format: chemin}"""
+    chemins = fichiers(figname, formats)
+    if tuple(formats) == ('png',):
+        style.sauve(fig, figname, fermer)
+        return chemins
+
+    rasters = [f for f in formats if f not in VECTEURS]
+    pool = None
+    try:
+        if _image() is not None and rasters:
+            # Un seul rendu Agg, compressé en parallèle des sorties vectorielles
+            pixels, taille = fig.canvas.print_to_buffer()
+            image = Image.frombuffer('RGBA', taille, pixels, 'raw', 'RGBA', 0, 1).convert('RGB')
+            pool = ThreadPool(len(rasters))
+            travaux = []
+            for f in rasters:
+                if f == 'web':
+                    args = (image, chemins[f], _web()[0], WEB_DPI, float(WEB_DPI) / fig.dpi)
+                else:
+                    args = (image, chemins[f], 'PNG', style.DPI)
+                travaux.append(pool.apply_async(_encode, args))
+        else:
+            for f in rasters:
+                fig.savefig(chemins[f], dpi = WEB_DPI if f == 'web' else style.DPI)
+
+        for f in formats:
+            if f in VECTEURS:
+                fig.savefig(chemins[f], format = f)
+
+        if pool is not None:
+            for t in travaux:
+                t.get()
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+        if fermer:
+            style.pyplot().close(fig)
+    return chemins
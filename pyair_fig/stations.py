@@ -0,0 +1,85 @@
+# -*- coding: UTF-8 -*-
+#Nom :  : stations.py
+#Description    : Index MESURE -> STATION pour les libellés des figures
+#Copyright  : 2015, LIMAIR
+
+"""Index des mesures XAIR.
+
+Une seule requête liste_mesures() pour tout le parc, conservée entre deux
+exécutions dans un fichier CSV. La résolution du libellé d'une mesure
+devient une simple recherche dans un dict ; la base n'est réinterrogée
+que si une mesure inconnue est demandée (nouvelle station). Les listes
+filtrées des scripts (liste_mesures(reseau='OZONE')) sont conservées de
+la même façon et réinterrogées quand leur fichier a plus de EXPIRATION
+jours ou quand l'index complet a été relu pendant l'exécution (une
+nouvelle station peut appartenir au réseau filtré).
+"""
+
+import os
+import time
+
+import pandas as pd
+
+EXPIRATION = 1   # jours : listes filtrées plus anciennes réinterrogées
+
+
+class IndexMesures(object):
+    def __init__(self, xr, fichier='../Cache/mesures.csv'):
+        self.xr      = xr
+        self.fichier = fichier
+        self.index   = None
+        self.a_jour  = False   # liste relue dans la base pendant cette exécution
+        self.releve  = 0.      # date (time.time) de cette relecture
+        self.listes  = {}      # listes filtrées de l'exécution
+
+    def station(self, mes):
+        """Code STATION de la mesure (clé du dict NOMS)"""
+        if self.index is None:
+            self._charge()
+        if mes not in self.index and not self.a_jour:
+            self.actualise()
+        return self.index[mes]
+
+    def liste(self, **filtres):
+        """Colonne MESURE de xr.liste_mesures(**filtres), relue dans le CSV
+        conservé tant qu'il n'est pas périmé (voir EXPIRATION)"""
+        cle = tuple(sorted(filtres.items()))
+        if cle not in self.listes:
+            nom = '-'.join(['mesures'] + ['%s-%s' % (k, v) for k, v in cle])
+            fichier = os.path.join(os.path.dirname(self.fichier), nom + '.csv')
+            if os.path.exists(fichier) and not self._perime(fichier):
+                self.listes[cle] = pd.read_csv(fichier, dtype=str, encoding='utf-8')['MESURE']
+            else:
+                df = self.xr.liste_mesures(**filtres)[['MESURE']]
+                self._ecrit(df, fichier)
+                self.listes[cle] = df['MESURE']
+        return self.listes[cle]
+
+    def _perime(self, fichier):
+        """Liste filtrée écrite avant la relecture de l'index complet
+        pendant cette exécution, ou depuis plus de EXPIRATION jours"""
+        ecrit = os.path.getmtime(fichier)
+        return ecrit < self.releve or time.time() - ecrit > EXPIRATION * 86400
+
+    def actualise(self):
+        """Relit la liste complète des mesures dans XAIR et la sauvegarde"""
+        df = self.xr.liste_mesures()[['MESURE', 'STATION']]
+        self.index  = dict(zip(df['MESURE'], df['STATION']))
+        self.a_jour = True
+        self.releve = time.time()
+        self.listes = {}
+        self._ecrit(df, self.fichier)
+
+    @staticmethod
+    def _ecrit(df, fichier):
+        dossier = os.path.dirname(fichier)
+        if dossier and not os.path.isdir(dossier):
+            os.makedirs(dossier)
+        df.to_csv(fichier, index=False, encoding='utf-8')
+
+    def _charge(self):
+        if os.path.exists(self.fichier):
+            df = pd.read_csv(self.fichier, dtype=str, encoding='utf-8')
+            self.index = dict(zip(df['MESURE'], df['STATION']))
+        else:
+            self.actualise()
@@ -0,0 +1,127 @@
+# -*- coding: UTF-8 -*-
+#Nom :  : stats.py
+#Description    : Statistiques réglementaires (dépassements, percentiles, taux de saisie)
+#Copyright  : 2015, LIMAIR
+
+"""Statistiques réglementaires des figures.
+
+Avec stat = True, les figures ma calculent pour chaque mesure, sur les
+données horaires déjà extraites pour la figure (une seule lecture) :
+    - taux de saisie horaire et journalier (jours à 75 % d'heures valides),
+    - moyenne, min et max horaires, P99.8 horaire et P90.4 journalier,
+    - nombres de dépassements des seuils de seuils.TABLE :
+        MVR, IR, A : heures (jours pour les PM10) au-dessus du seuil,
+        VL de l'O3 et du CO : jours dont le max de la moyenne sur 8 h
+        dépasse la valeur,
+      et des valeurs limites horaires (VLH) et journalières (VLJ).
+La table est écrite à côté de la figure (<DOSSIER><figname>-stats.csv).
+"""
+
+from __future__ import print_function
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from pyair_fig import agregats
+from pyair_fig import seuils
+from pyair_fig import style
+from pyair_fig.serie import Serie
+
+# Valeurs limites sur moyennes horaires et journalières (absentes de seuils.TABLE)
+VLH = {'NO2':200, 'SO2':350}
+VLJ = {'PM10':50, 'PM10NC':50, 'SO2':125}
+
+ALERTE_JOURNALIERE = ('PM10', 'PM10NC')   # MVR, IR et A sur moyennes journalières
+MAX_8H             = ('O3', 'CO')         # VL sur le max journalier de la moyenne 8 h
+
+PERCENTILES = (('P99.8 H', 'H', 99.8), ('P90.4 J', 'J', 90.4))
+
+BASES = {'H' : 'heures',
+         'J' : 'jours',
+         '8H': 'jours max 8h'}
+
+
+def indicateurs(nom, table=seuils.TABLE):
+    """Dépassements comptés pour le polluant nom : [(colonne, base, seuil)],
+    base 'H' (moyennes horaires), 'J' (moyennes journalières) ou '8H' (max
+    journalier de la moyenne glissante sur 8 h)"""
+    valeurs = dict(seuils.valeurs(nom, seuils.ORDRE, table))
+    base = 'J' if nom in ALERTE_JOURNALIERE else 'H'
+    res = [(code, base, valeurs[code]) for code in ('MVR', 'IR', 'A') if code in valeurs]
+    if nom in VLH:
+        res.append(('VLH', 'H', VLH[nom]))
+    if nom in VLJ:
+        res.append(('VLJ', 'J', VLJ[nom]))
+    if nom in MAX_8H and 'VL' in valeurs:
+        res.append(('VL', '8H', valeurs['VL']))
+    return [('%s > %s' % (BASES[b], code), b, v) for code, b, v in res]
+
+
+def _percentile(valeurs, q):
+    valeurs = valeurs[~np.isnan(valeurs)]
+    if not len(valeurs):
+        return np.nan
+    return np.percentile(valeurs, q)
+
+
+def calcule(nom, serie, freq, debut, fin, valides=0.75, table=seuils.TABLE):
+    """Statistiques des mesures de serie (Serie ou DataFrame au pas freq)
+    sur la période debut - fin : DataFrame (mesures x statistiques)"""
+    if isinstance(serie, pd.DataFrame):
+        serie = Serie.depuis(serie, freq)
+    debut = pd.Timestamp(debut).normalize()
+    fin   = pd.Timestamp(fin).normalize() + pd.Timedelta(days=1)
+    heures_attendues = int((fin - debut) / pd.Timedelta(hours=1))
+    jours_attendus   = int((fin - debut) / pd.Timedelta(days=1))
+
+    # Moyennes horaires (données quart-horaires)
+    if freq != 'H':
+        serie = serie.par_periode('H', 'mean', valides)
+    index = serie.index
+    inds  = indicateurs(nom, table)
+
+    lignes = []
+    for j, mes in enumerate(serie.colonnes):
+        h = serie.colonne(j)
+        ligne = {'mesure': mes, 'polluant': nom}
+        if len(index):
+            jour  = agregats.par_periode(h[:, np.newaxis], index, 'D', 'mean', valides)[0][:, 0]
+            max8h = agregats.par_periode(agregats.glissante(h[:, np.newaxis], 8, valides)[0],
+                                         index, 'D', 'max', valides)[0][:, 0]
+        else:
+            jour = max8h = np.empty(0)
+        bases = {'H': h, 'J': jour, '8H': max8h}
+
+        ok = ~np.isnan(h)
+        ligne['saisie H (%)'] = 100. * ok.sum() / heures_attendues
+        ligne['saisie J (%)'] = 100. * (~np.isnan(jour)).sum() / jours_attendus
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)   # mesure sans données
+            ligne['moyenne'] = np.nanmean(h) if ok.any() else np.nan
+            ligne['min']     = np.nanmin(h) if ok.any() else np.nan
+            ligne['max']     = np.nanmax(h) if ok.any() else np.nan
+            for libelle, base, q in PERCENTILES:
+                ligne[libelle] = _percentile(bases[base], q)
+            for libelle, base, valeur in inds:
+                ligne[libelle] = int(np.sum(bases[base] > valeur))
+        lignes.append(ligne)
+
+    colonnes = (['polluant', 'saisie H (%)', 'saisie J (%)', 'moyenne', 'min', 'max']
+                + [p[0] for p in PERCENTILES] + [i[0] for i in inds])
+    return pd.DataFrame(lignes, columns=['mesure'] + colonnes).set_index('mesure')
+
+
+def fichier(figname):
+    return style.DOSSIER + figname + '-stats.csv'
+
+
+def ecrit(figname, tables):
+    """Écrit les tables (une par famille de polluant) à côté de la figure"""
+    colonnes = []
+    for table in tables:
+        colonnes += [c for c in table.columns if c not in colonnes]
+    df = pd.concat([table.reindex(columns=colonnes) for table in tables])
+    df.to_csv(fichier(figname), encoding='utf-8', float_format='%.4g')
+    return df
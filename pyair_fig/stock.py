@@ -0,0 +1,185 @@
+# -*- coding: UTF-8 -*-
+#Nom :  : stock.py
+#Description    : Stock d'agrégats journaliers, mensuels et annuels par mesure
+#Copyright  : 2015, LIMAIR
+
+"""Stock d'agrégats.
+
+Pour chaque mesure, les moyennes, max, percentiles et nombres de valeurs
+(présentes et attendues) par jour, mois et année sont calculés une fois à
+partir des données brutes et conservés dans un fichier HDF5
+(<dossier>/<freq>/<MESURE>.h5, clés 'A/a1999', 'M/a1999', 'D/a1999').
+Comme pour cache.CacheXAIR, une année calculée après son 31/12 est close ;
+seule l'année en cours est recalculée. Les figures d'historique lisent
+quelques dizaines de valeurs au lieu de toutes les données horaires.
+"""
+
+import os
+import datetime
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from pyair_fig import agregats
+from pyair_fig import extraction
+from pyair_fig.cache import jour, liste, JOUR, VERROU
+
+NIVEAUX     = ('D', 'M', 'A')
+PERCENTILES = (50, 90.4, 98, 99.8)   # calculés par mois et par année
+COLONNES    = ['moyenne', 'max', 'comptes', 'attendus'] + ['p%s' % p for p in PERCENTILES]
+
+
+def agregats_annee(df, freq, annee):
+    """Agrégats de l'année pour les mesures (colonnes) de df :
+    {niveau: {mesure: DataFrame(COLONNES)}}"""
+    index = pd.date_range('%i-01-01' % annee, '%i-01-01' % (annee + 1), freq=freq, closed='left')
+    valeurs = np.asarray(df.reindex(index).values, dtype=np.float64)
+    k = valeurs.shape[1]
+
+    res = {}
+    for niveau in NIVEAUX:
+        debuts, dates, attendus = agregats.periodes(index, niveau)
+        moyenne, comptes, _ = agregats.par_periode(valeurs, index, niveau, 'mean', valides=0)
+        maxi, _, _          = agregats.par_periode(valeurs, index, niveau, 'max', valides=0)
+        cols = {'moyenne' : moyenne,
+                'max'     : maxi,
+                'comptes' : comptes,
+                'attendus': np.repeat(np.asarray(attendus)[:, np.newaxis], k, axis=1)}
+
+        if niveau != 'D':
+            bornes = np.r_[debuts, len(index)]
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)   # périodes sans données
+                q = np.array([np.nanpercentile(valeurs[d:f], PERCENTILES, axis=0)
+                              for d, f in zip(bornes[:-1], bornes[1:])])
+            for i, p in enumerate(PERCENTILES):
+                cols['p%s' % p] = q[:, i, :]
+        else:
+            for p in PERCENTILES:
+                cols['p%s' % p] = np.full((len(dates), k), np.nan)
+
+        res[niveau] = dict((mes, pd.DataFrame(dict((c, v[:, j]) for c, v in cols.items()),
+                                              index=dates)[COLONNES])
+                           for j, mes in enumerate(df.columns))
+    return res
+
+
+class StockAgregats(object):
+    """Agrégats des mesures de xr (xair.XAIR, cache.CacheXAIR ou
+    extraction.PoolXAIR), calculés à la demande et conservés"""
+
+    def __init__(self, xr, dossier='../Cache/agregats'):
+        self.xr      = xr
+        self.dossier = dossier
+
+    def get_agregats(self, mes, debut, fin, freq='H', niveau='A', stat='moyenne', valides=None):
+        """DataFrame (périodes x mesures) de la statistique stat (colonne de
+        COLONNES) au niveau 'D', 'M' ou 'A'. Si valides (ex. 0.75) est donné,
+        les périodes sous ce taux de données valides sont mises à NaN."""
+        return self.extrait([(mes, debut, fin, freq)], niveau, stat, valides)[0]
+
+    def extrait(self, requetes, niveau='A', stat='moyenne', valides=None):
+        """Comme extraction.extrait pour les requêtes [(mes, debut, fin, freq)],
+        mais renvoie les agrégats ; les années à calculer sont extraites une
+        par une (en flux, simultanément si xr est un PoolXAIR) et réduites
+        dès leur arrivée. Si stat est une liste de colonnes (ex. ['moyenne',
+        'comptes', 'attendus']), chaque résultat est un dict {stat: DataFrame}
+        lu en une fois"""
+        maintenant = pd.Timestamp(datetime.datetime.now())
+
+        a_calculer = {}   # (freq, annee) -> [mesures]
+        with VERROU:
+            for mes, debut, fin, freq in requetes:
+                for m in liste(mes):
+                    for annee in self._manquants(m, freq, jour(debut).year, jour(fin).year):
+                        groupe = a_calculer.setdefault((freq, annee), [])
+                        if m not in groupe:
+                            groupe.append(m)
+
+        # Une année de données brutes à la fois (par PoolXAIR en cours)
+        cles   = sorted(a_calculer)
+        bruts  = extraction.flux(self.xr, [(a_calculer[(freq, annee)],
+                                            '%i-01-01' % annee, '%i-12-31' % annee, freq)
+                                           for freq, annee in cles])
+        for (freq, annee), df in zip(cles, bruts):
+            df = df.reindex(columns=a_calculer[(freq, annee)])
+            res = agregats_annee(df, freq, annee)
+            del df
+            with VERROU:
+                self._ecrit(freq, annee, res, maintenant)
+
+        stats = list(stat) if isinstance(stat, (list, tuple)) else [stat]
+        res = []
+        with VERROU:
+            for mes, debut, fin, freq in requetes:
+                lus = [self._lit(m, freq, jour(debut), jour(fin), niveau, stats, valides)
+                       for m in liste(mes)]
+                par_stat = dict((st, pd.concat([l[st] for l in lus], axis=1)) for st in stats)
+                res.append(par_stat if isinstance(stat, (list, tuple)) else par_stat[stat])
+        return res
+
+    def fichier(self, mes, freq):
+        return os.path.join(self.dossier, freq, '%s.h5' % mes)
+
+    @staticmethod
+    def _etat(store):
+        if 'etat' in store:
+            return store['etat']
+        return pd.DataFrame(columns=['calcul'])
+
+    def _manquants(self, mes, freq, debut, fin):
+        """Années à (re)calculer : absentes ou non closes"""
+        chemin = self.fichier(mes, freq)
+        if not os.path.exists(chemin):
+            return list(range(debut, fin + 1))
+        store = pd.HDFStore(chemin)
+        try:
+            etat = self._etat(store)
+        finally:
+            store.close()
+        return [annee for annee in range(debut, fin + 1)
+                if annee not in etat.index
+                or etat.loc[annee, 'calcul'] <= pd.Timestamp('%i-12-31' % annee) + JOUR]
+
+    def _ecrit(self, freq, annee, res, maintenant):
+        for mes in res['A']:
+            chemin = self.fichier(mes, freq)
+            if not os.path.isdir(os.path.dirname(chemin)):
+                os.makedirs(os.path.dirname(chemin))
+            store = pd.HDFStore(chemin)
+            try:
+                for niveau in NIVEAUX:
+                    store.put('%s/a%i' % (niveau, annee), res[niveau][mes])
+                etat = self._etat(store)
+                etat.loc[annee] = [maintenant]
+                store.put('etat', etat)
+            finally:
+                store.close()
+
+    def _lit(self, mes, freq, debut, fin, niveau, stats, valides):
+        """{stat: Series} de la mesure mes pour chaque stat de stats ; Series
+        vides si aucune année du stock ne recoupe la période (ex. figure
+        antérieure au début de l'historique d'une typologie)"""
+        chemin = self.fichier(mes, freq)
+        parts  = []
+        if os.path.exists(chemin):
+            store = pd.HDFStore(chemin)
+            try:
+                parts = [store['%s/a%i' % (niveau, annee)] for annee in range(debut.year, fin.year + 1)
+                         if '%s/a%i' % (niveau, annee) in store]
+            finally:
+                store.close()
+        if not parts:
+            return dict((stat, pd.Series([], index=pd.DatetimeIndex([]), dtype=np.float64, name=mes))
+                        for stat in stats)
+        df = pd.concat(parts)
+        df = df[(df.index >= debut) & (df.index < fin + JOUR)]
+        res = {}
+        for stat in stats:
+            serie = df[stat].copy()
+            if valides is not None:
+                serie[df['comptes'] < agregats.minimum(valides, df['attendus'])] = np.nan
+            serie.name = mes
+            res[stat] = serie
+        return res
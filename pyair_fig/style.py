@@ -0,0 +1,241 @@
+# -*- coding: UTF-8 -*-
+#Nom :  : style.py
+#Description    : Paramétrage Matplotlib commun aux figures standardisées
+#Copyright  : 2015, LIMAIR
+
+mpl = None   # matplotlib et pyplot (backend Agg), importés au premier rendu
+plt = None
+
+
+DOSSIER = '../Figures/'   # Répertoire de sortie des figures
+
+# Nom : colonne STATION disponible avec xr.liste_stations
+NOMS = {
+    "AINE": u"Limoges / Place d'Aine",
+    "PRESID": u"Limoges / Présidial",
+    "MADOUM": "Limoges / Madoumier",
+    "GARROS": "Limoges / Palais sur Vienne",
+    "DALTON": "Brive la Gaillarde / Dalton",
+    "NICOLA": u"Guéret / Nicolas",
+    "HUGO": "Tulle / Hugo",
+    "VICTOR": "Tulle / Victor",
+    "FONTAI": "Saint Junien / Fontaine",
+    "IPAPER": "Saillat sur Vienne / IPaper",
+    "MERA": u"La Nouaille / MERA",
+    "RIVAILLES": u"Limoges / Palais sur Vienne",
+    "ALVEOL2015":u"Alvéol / Le Vignaud",
+    "O3": r'$\rm{O_3}$',
+    "NO2": r'$\rm{NO_2}$',
+    "PM10": r"$\rm{PM10}$", #" - AVEC fraction semi-volatile",
+    "PM10NC": r"$\rm{PM10}$ - SANS fraction semi-volatile",
+    "PM25": r"$\rm{PM2.5}$",
+    "SO2": r'$\rm{SO_2}$',
+    "H2S": r'$\rm{H_2S}$',
+    "CO": "CO",
+    "TRS":"TRS"}
+
+SIZE = {'L':(6.2992, 3.5433),'S':(6.2992/2, 3.5433/1.5)} #  L (16cm,9cm)
+AXE  = {'L':[0.12, 0.2, 0.85, 0.62],'S':[0.12, 0.24, 0.85, 0.54]} #  L [Xmin, Ymin, Xmax, Ymax]
+
+DPI           = 300
+LINEWIDTH     = 0.3
+XFONTSIZE     = {'L':5.8,'S':5.8}
+UNITSIZE      = {'L':6.4,'S':6.4}
+LEGFONTSIZE   = {'L':5.5,'S':3.5}
+LEGMARKERSIZE = 0.78
+
+
+def pyplot():
+    """matplotlib.pyplot, importé (backend Agg) au premier appel : les
+    exécutions servies par le cache n'importent pas matplotlib"""
+    global mpl, plt
+    if plt is None:
+        import matplotlib
+        matplotlib.use('Agg')
+        from matplotlib import pyplot
+        mpl, plt = matplotlib, pyplot
+    return plt
+
+
+def init_mpl(size):
+    """rcParams des figures standardisées, pour la taille size ('L' ou 'S')"""
+    pyplot()
+    mpl.rcParams['axes.formatter.use_locale'] = True
+    mpl.rcParams['xtick.labelsize']           = XFONTSIZE[size]
+    mpl.rcParams['xtick.direction']           = 'in'
+    mpl.rcParams['ytick.labelsize']           = XFONTSIZE[size]
+    mpl.rcParams['ytick.direction']           = 'in'
+    mpl.rcParams['axes.linewidth']            = 0.5
+    mpl.rcParams['axes.axisbelow']            = True
+    mpl.rcParams['legend.fontsize']           = 'x-small'
+    mpl.rcParams['legend.borderpad']          = 0.5  # border whitspace in fontsize units
+    mpl.rcParams['legend.markerscale']        = 1  # the relative size of legend markers vs. original
+    mpl.rcParams['legend.numpoints']          = 2 # the number of point in the legend for lines
+    mpl.rcParams['legend.handlelength']       = 2  # the length of the legend lines
+    mpl.rcParams['legend.labelspacing']       = 0.010  # the vertical space between the legend entries
+    mpl.rcParams['legend.handletextpad']      = 0.60  # the space between the legend line and legend text
+    mpl.rcParams['legend.borderaxespad']      = 0.02  # the border between the axes and legend edge
+    mpl.rcParams['legend.shadow']             = False
+
+
+#################       Création Figure        ####################
+
+def new_fig(size, couleurs=None):
+    fig = pyplot().figure(num = None,
+                    figsize   = SIZE[size],
+                    dpi       = DPI,
+                    facecolor = 'w',
+                    edgecolor = 'w')
+    ax  = style_axe(fig.add_axes(AXE[size]), couleurs)
+    return fig, ax
+
+
+def new_planche(size, lignes, colonnes, n=None, couleurs=None):
+    """Figure de lignes x colonnes panneaux de taille size (n premiers,
+    ligne par ligne) : chaque panneau occupe la place et a le style d'une
+    figure new_fig(size) ; une seule figure à rendre et à écrire"""
+    largeur, hauteur = SIZE[size]
+    fig = pyplot().figure(num = None,
+                    figsize   = (largeur * colonnes, hauteur * lignes),
+                    dpi       = DPI,
+                    facecolor = 'w',
+                    edgecolor = 'w')
+    x, y, l, h = AXE[size]
+    axes = []
+    for i in range(lignes * colonnes if n is None else n):
+        ligne, colonne = divmod(i, colonnes)
+        position = [(colonne + x) / colonnes, (lignes - 1 - ligne + y) / lignes,
+                    l / colonnes, h / lignes]
+        axes.append(style_axe(fig.add_axes(position), couleurs))
+    return fig, axes
+
+
+def style_axe(ax, couleurs=None):
+    """Style commun des axes des figures standardisées"""
+    if couleurs is not None:
+        ax.set_color_cycle(couleurs)
+    ax.set_axis_bgcolor('white')
+
+    #Décollement des axes
+    ax.spines['left'].set_position(('axes',-0.04))
+    ax.spines['bottom'].set_position(('axes',-0.07))
+    ax.spines['bottom'].set_color('black')
+    ax.spines['top'].set_color('white')
+    ax.spines['right'].set_color('white')
+    ax.spines['left'].set_color('black')
+    ax.spines['bottom'].set_visible(True)
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.spines['left'].set_visible(True)
+    ax.tick_params(direction = 'out',
+                   length      = 6,
+                   color       = 'black',
+                   which       = 'both',
+                   bottom      = True,
+                   top         = False,
+                   right       = False,
+                   left        = True,
+                   labelbottom = True,
+                   labeltop    = False,
+                   labelright  = False,
+                   labelleft   = True)
+    return ax
+
+
+class Gabarit(object):
+    """Figure stylée (new_fig) construite une fois par taille et réutilisée
+    pour toutes les figures d'un lot : à chaque figure, prepare() retire les
+    tracés, seuils, textes et légende de la précédente."""
+
+    def __init__(self, size, couleurs=None):
+        self.size     = size
+        self.couleurs = couleurs
+        init_mpl(size)
+        self.fig, self.ax = new_fig(size, couleurs)
+
+    def prepare(self):
+        init_mpl(self.size)
+        ax = self.ax
+        for artiste in ax.lines[:] + ax.collections[:] + ax.texts[:]:
+            artiste.remove()
+        if ax.legend_ is not None:
+            ax.legend_.remove()
+            ax.legend_ = None
+
+        # Etat laissé par les tracés pandas (fréquence de l'axe des dates)
+        for attr in ('freq', '_plot_data', 'view_interval', 'date_axis_info', 'legendlabels'):
+            if hasattr(ax, attr):
+                delattr(ax, attr)
+        if hasattr(ax.xaxis, 'freq'):
+            del ax.xaxis.freq
+        ax.xaxis.converter = None
+        ax.xaxis.units     = None
+
+        if self.couleurs is not None:
+            ax.set_color_cycle(self.couleurs)
+        ax.relim()
+        ax.set_autoscale_on(True)
+        return self.fig, ax
+
+    def ferme(self):
+        pyplot().close(self.fig)
+
+
+def gabarit(gabarits, size, couleurs=None):
+    """Gabarit de taille size du dict gabarits, créé au premier appel"""
+    if size not in gabarits:
+        gabarits[size] = Gabarit(size, couleurs)
+    return gabarits[size]
+
+
+def echelle(max, paliers=(300, 200, 100, 50, 10, 1)):
+    """Max de l'échelle : plus petit palier supérieur ou égal à max"""
+    maxi = None
+    for palier in paliers:
+        if max <= palier:
+            maxi = palier
+    return maxi
+
+
+def unite(nom):
+    if nom == 'CO':
+        return r'$\rm{mg/m^3}$'
+    return r'$\rm{\mu g/m^3}$'
+
+
+def finalise(fig, ax, size, unit, col, legende=(-0.075, 1.08, 1., .10)):
+    """Taille des axes, unité, grille et légende"""
+    # Taille axes
+    for tick in ax.xaxis.get_major_ticks():
+        tick.label.set_fontsize(XFONTSIZE[size])
+    for tick in ax.yaxis.get_major_ticks():
+        tick.label.set_fontsize(XFONTSIZE[size])
+
+    # Unit
+    if unit is not None:
+        ax.text(-0.05, 1.03, unit,
+                ha = 'center',
+                va = 'bottom',
+                fontsize = UNITSIZE[size],
+                transform = ax.transAxes)
+
+    # Grille
+    ax.xaxis.grid(False, which = 'both')
+    ax.yaxis.grid(True, which = 'both', color = 'darkgrey')
+    ax.set_xlabel('')
+    ax.set_ylabel('')
+
+    # Légende
+    leg = ax.legend(bbox_to_anchor = legende,
+                    loc  = 3,
+                    ncol = col,
+                    mode = None,
+                    fontsize = LEGFONTSIZE[size])
+    leg.draw_frame(False)
+    return leg
+
+
+def sauve(fig, figname, fermer=True):
+    fig.savefig(DOSSIER + figname, dpi = DPI)
+    if fermer:
+        pyplot().close(fig)
@@ -0,0 +1,390 @@
+# -*- coding: UTF-8 -*-
+#Nom :  : typo.py
+#Description    : Figures standardisées - Historique par typologie de station
+#Copyright  : 2015, LIMAIR
+
+from __future__ import print_function
+
+import numpy as np
+import pandas as pd
+
+from pyair_fig import agregats
+from pyair_fig import catalogue
+from pyair_fig import chrono
+from pyair_fig import empreinte
+from pyair_fig import raccord
+from pyair_fig import seuils
+from pyair_fig import sortie
+from pyair_fig import style
+from pyair_fig.collecteur import Collecteur
+
+###################################################################
+
+"""Définition des polluants - Mesures automatiques (analyseurs)"""
+
+#Polluants par typo de stations
+NO2_U   = ['NO2_PRE', 'NO2_DAL', 'NO2_NIC', 'NO2_HUG', 'NO2_FON']
+NO2_I   = ['NO2_IPA']
+NO2_T   = ['NO2_AIN', 'NO2_VIC']
+O3_U    = ['O3_PRE', 'O3_DAL', 'O3_NIC', 'O3_HUG', 'O3_FON']
+O3_P    = ['O3_GAR']
+O3_R    = ['O3_MER']
+SO2_U   = ['SO2_PRE', 'SO2_FON']
+SO2_P   = ['SO2_GAR']
+SO2_I   = ['SO2_IPA', 'SO2_FA']
+PM10C_U = ['PM10C_PRE', 'PM10C_DAL', 'PM10C_NIC', 'PM10C_HUG', 'PM10C_FON']
+PM10C_P = ['PM10C_GAR']
+PM10C_I = ['PM10C_IPA']
+PM10C_T = ['PM10C_AIN']
+PM25_U  = ['PM25_PRE']
+PM25_T  = ['PM25_VIC']
+CO_U    = ['CO_NIC']
+CO_T    = ['CO_AIN']
+TRS_I   = ['TRS_IPA']
+
+#PM10 non corrigé pour l'histo de 1998 à 2006   , attention ordre PM10 et PM10C doit être identique
+HISTO   = 2007
+PM10NC_U = ['PM10NC_PRE', 'PM10_DAL', 'PM10_NIC', 'PM10_HUG', 'PM10_FON']
+PM10NC_P = ['PM10_GAR']
+PM10NC_I = ['PM10_IPA']
+PM10NC_T = ['PM10_AIN']
+PMNC = {'Station(s) urbaine(s)':PM10NC_U,
+       u'Station(s) périurbaine(s)':PM10NC_P,
+        'Station(s) industrielle(s)':PM10NC_I,
+        'Station(s) trafic(s)':PM10NC_T }
+
+#Définition des classes
+class Typo():
+    def __init__(self, nom, malist):
+        self.nom    = nom
+        self.malist = malist
+    def get_nom(self):
+        return self.nom
+    def get_malist(self):
+        return self.malist
+
+urbain   = Typo('Station(s) urbaine(s)', [NO2_U, O3_U, SO2_U, PM10C_U, PM25_U, CO_U])
+periurb  = Typo(u'Station(s) périurbaine(s)', [O3_P, SO2_P, PM10C_P])
+trafic   = Typo('Station(s) trafic(s)',[NO2_T, PM10C_T, PM25_T, CO_T])
+rural    = Typo('Station(s) rurale(s)', [O3_R])
+indus    = Typo('Station(s) industrielle(s)', [NO2_I, SO2_I, PM10C_I, TRS_I])
+stations = [urbain, periurb, trafic, indus, rural]
+
+
+class Polluant():
+    def __init__(self, nom, malist, freq):
+        self.nom      = nom
+        self.malist   = malist
+        self.freq     = freq
+    def get_nom(self):
+        return self.nom
+    def get_malist(self):
+        return self.malist
+    def get_freq(self):
+        return self.freq
+
+NO2  = Polluant('NO2', [NO2_U, NO2_I, NO2_T],'H')
+O3   = Polluant('O3', [O3_U, O3_P, O3_R],'H')
+SO2  = Polluant('SO2', [SO2_U, SO2_P, SO2_I],'H')
+PM10 = Polluant('PM10', [PM10C_U, PM10C_P, PM10C_I, PM10C_T],'D')
+PM25 = Polluant('PM25', [PM25_U, PM25_T],'D')
+CO   = Polluant('CO', [CO_U, CO_T],'H')
+TRS  = Polluant('TRS',[TRS_I],'H')
+list_polluants = [NO2, O3, SO2, PM10, PM25, CO,TRS]
+
+KEY = { 'NO2':NO2,'O3':O3, 'SO2':SO2, 'PM10':PM10, 'PM25':PM25, 'CO':CO, 'TRS':TRS }
+
+# Début de l'historique par typologie ; None : paramètre histo de la figure
+Historique_U_P = { 'NO2':None,'O3':None, 'SO2':None, 'PM10':None, 'PM25':2009, 'CO':2010 }
+Historique_T   = { 'NO2':2009, 'PM10':2009, 'PM25':2013, 'PM10':2009, 'CO':2010 }
+Historique_I   = { 'NO2':2008, 'SO2':2002, 'PM10':2008, 'TRS':2008}
+Historique_R   = {'O3':2003 }
+HISTORIQUES    = {urbain.get_nom() : Historique_U_P,
+                  periurb.get_nom(): Historique_U_P,
+                  trafic.get_nom() : Historique_T,
+                  indus.get_nom()  : Historique_I,
+                  rural.get_nom()  : Historique_R}
+
+
+# Seuils d'alerte NO2, SO2, O3 et PM10 et Valeurs réglementaires
+VL      = {'NO2':40,'PM10':40,'PM25':25,'CO':10}
+OQ      = {'NO2':40,'O3':120,'PM10':30,'PM25':10,}
+OMS     = {'NO2':40,'O3':100,'PM10':20,'PM25':10,'H2S':7}
+SEUILS_ANNUELS = seuils.table(VL=VL, OQ=OQ, OMS=OMS)
+
+COULEURS = {u'Station(s) rurale(s)':'#00ff00',                   #Vert foncé : C1000 M0 J100 N0
+            u'Station(s) trafic(s)':'#ff0000',                   #Rouge : C0 M100 J100 N0
+            u'Station(s) urbaine(s)':'#0033ff',                  #Bleu foncé : C100 M80 J0 N0
+            u'Station(s) périurbaine(s)':'#802600',              #Marron : C0 M70 J100 N50
+            u'Station(s) industrielle(s)':'#ff8000'}             #Orange : C0 M50 J100 No
+
+PALIERS = (300, 250, 200, 100, 50, 10, 1)   # max de l'échelle
+
+# Paramètres d'une figure, mêmes noms que les variables du script pyair_fig-ma-typo.py
+DEFAUTS = {
+    'polluant'   : 'O3',     # PM10, PM25, O3, NO2, CO ou TRS ; liste : planche (voir panneaux)
+    'histo'      : 1999,
+    'ANNEE'      : 2015,
+    'Valeur_lim' : False,
+    'Obj_qual'   : True,
+    'Oms'        : True,
+    'figname'    : None,     # None : polluant + "-histo" (planche : "planche-histo")
+    'size'       : 'S',      # L : Large , S : Small
+    'MARKERSIZE' : 2,        # Taille des points
+    'COL'        : 2,        # Nombre de colonne dans la légende
+    'colonnes'   : 2,        # Nombre de colonnes de panneaux (planche)
+    'maxi'       : None,     # max de l'échelle, optionnel. Si = None, calculé auto
+    'mes_valides': None,     # ex. 0.75 : années de station sous ce taux de saisie écartées (voir spec)
+    'pondere'    : False,    # True : moyenne par typologie pondérée par le nombre de valeurs
+    'catalogue'  : None,     # CSV des mesures par typologie (voir catalogue.py) ; None : listes ci-dessus
+    'stat'       : False,
+    'SORTIES'    : ('png',), # formats écrits : png, pdf, svg, web (voir sortie.py)
+    'FORCE'      : False}    # True : figure redessinée même si données et paramètres inchangés
+
+
+def spec(**params):
+    """Paramètres complets d'une figure (DEFAUTS complétés par params).
+
+    mes_valides vaut None par défaut, contrairement aux figures ma (0.75) :
+    le taux de saisie d'une moyenne annuelle est compté sur l'année civile
+    entière, si bien que le critère des 75 % écarterait l'année en cours
+    (ANNEE avant octobre) et l'année de mise en service de chaque station.
+    Les courbes par défaut restent celles du calcul historique."""
+    inconnus = set(params) - set(DEFAUTS)
+    if inconnus:
+        raise ValueError(u"Paramètre(s) inconnu(s) : %s" % ', '.join(sorted(inconnus)))
+    s = dict(DEFAUTS)
+    s.update(params)
+    if isinstance(s['polluant'], (list, tuple)):
+        s['polluant'] = list(s['polluant'])
+        if not s['polluant']:
+            raise ValueError("Planche sans polluant")
+    for nom in polluants(s):
+        if nom not in KEY:
+            raise ValueError("Polluant inconnu : %s" % nom)
+    if s['figname'] is None:
+        s['figname'] = "planche-histo" if planche(s) else s['polluant'] + "-histo"
+    return s
+
+
+def planche(s):
+    """True si la figure est une planche (liste de polluants)"""
+    return isinstance(s['polluant'], list)
+
+
+def polluants(s):
+    return s['polluant'] if planche(s) else [s['polluant']]
+
+
+def panneaux(s):
+    """Paramètres de chaque panneau d'une planche (une figure d'un
+    polluant), [s] pour une figure simple"""
+    if not planche(s):
+        return [s]
+    return [dict(s, polluant = nom, figname = s['figname'] + '-' + nom) for nom in s['polluant']]
+
+
+def groupes(s):
+    """Typologie et début d'historique de chaque groupe de mesures :
+    [(mesures, typo, histo)] (voir catalogue.py)"""
+    nom = KEY[s['polluant']].get_nom()
+    return [(mes, typo, s['histo'] if histo is None else histo)
+            for mes, typo, histo in catalogue.charge(s['catalogue']).groupes(nom)]
+
+
+def segments(s):
+    """Segments (voir raccord.py) de chaque groupe de mesures :
+    [[(mesures, debut, fin)]] dans l'ordre de groupes(s)"""
+    nom = KEY[s['polluant']].get_nom()
+    res = []
+    for mes, typo, histo in groupes(s):
+        debut, fin = "%i-01-01" % histo, "%i-12-31" % s['ANNEE']
+        # Cas Particules non corrigées avant 2007
+        if nom in 'PM10':
+            nc = [catalogue.charge(s['catalogue']).pmnc(m) for m in mes]
+            res.append(raccord.segments(nc, mes, '%i-01-01' % HISTO, debut, fin))
+        else:
+            res.append([(mes, debut, fin)])
+    return res
+
+
+def besoins(s):
+    """Extractions nécessaires à la figure : [(mesures, debut, fin, freq)]"""
+    freq = KEY[s['polluant']].get_freq()
+    return [r for groupe in segments(s) for r in raccord.requetes(groupe, freq)]
+
+
+def agregat(s):
+    """Agrégat annuel lu dans le stock : max (O3) ou moyenne"""
+    return 'max' if KEY[s['polluant']].get_nom() in 'O3' else 'moyenne'
+
+
+##################          Figure             ######################
+
+def execute(figures, stock):
+    """Génère les figures (dicts de paramètres, voir spec) ; les agrégats
+    manquants de tout le lot sont calculés en une passe"""
+    specs = [spec(**f) for f in figures]
+    simples = [p for s in specs for p in panneaux(s)]
+    for a in set(agregat(s) for s in simples):
+        stock.extrait([b for s in simples if agregat(s) == a for b in besoins(s)], 'A', a)
+    return [figure(s, stock) for s in specs]
+
+
+def figure(s, stock):
+    """Génère la figure décrite par s (voir spec) ; stock : stock.StockAgregats"""
+    with chrono.figure(s['figname']):
+        if planche(s):
+            courbes = [calcule(p, stock) for p in panneaux(s)]
+        else:
+            courbes = calcule(s, stock)
+        cle = cle_figure(s, courbes)
+        if a_jour(s, cle):
+            return s['figname']
+        if planche(s):
+            trace_planche(s, courbes)
+        else:
+            trace(s, courbes)
+        empreinte.enregistre(s['figname'], cle)
+    return s['figname']
+
+
+def cle_figure(s, courbes):
+    """Empreinte de la figure : paramètres, courbes et seuils annuels"""
+    exclus = ('stat', 'FORCE') if planche(s) else ('stat', 'FORCE', 'colonnes')
+    params = dict((k, v) for k, v in s.items() if k not in exclus)
+    return empreinte.calcule(params, courbes, SEUILS_ANNUELS)
+
+
+def a_jour(s, cle):
+    """True si la figure existe déjà avec la même empreinte (sauf FORCE)"""
+    if s['FORCE'] == True:
+        return False
+    return empreinte.a_jour(s['figname'], cle, sortie.fichiers(s['figname'], s['SORTIES']).values())
+
+
+def calcule(s, stock):
+    """Max (O3) ou moyennes annuelles par typologie : [(typo, df)]"""
+    nom = KEY[s['polluant']].get_nom()
+
+    # Max annuels (O3) ou moyennes annuelles lus dans le stock d'agrégats, les
+    # données brutes ne sont extraites que pour les années pas encore calculées
+    # (extraction des années manquantes comprise)
+    a = agregat(s)
+    with chrono.etape('agregation') as e:
+        resultats = stock.extrait(besoins(s), 'A', [a, 'comptes', 'attendus'])
+        e.lignes = sum(len(r[a].index) for r in resultats)
+
+    # Segments de chaque groupe raccordés (PM10 non corrigés puis corrigés),
+    # puis tous les groupes en un tableau années x stations, réduit par
+    # groupe en une fois : max (O3) ou moyenne, taux de saisie et
+    # pondération éventuels
+    with chrono.etape('compression') as e:
+        resultats = iter(resultats)
+        groupes_stats = []
+        for groupe in segments(s):
+            parts = [next(resultats) for _ in groupe]
+            groupes_stats.append(dict((stat, raccord.assemble(groupe, [p[stat] for p in parts]))
+                                      for stat in (a, 'comptes', 'attendus')))
+        index = groupes_stats[0][a].index
+        for g in groupes_stats[1:]:
+            index = index.union(g[a].index)
+        tableau = lambda stat: np.hstack([np.asarray(g[stat].reindex(index).values, dtype=np.float64)
+                                          for g in groupes_stats])
+        debuts = np.cumsum([0] + [g[a].shape[1] for g in groupes_stats[:-1]])
+        moyenne, _, maxi = agregats.par_groupe(tableau(a), debuts, tableau('comptes'),
+                                               tableau('attendus'), s['mes_valides'],
+                                               s['pondere'] == True)
+        compresse = maxi if nom in 'O3' else moyenne
+        e.lignes = len(index)
+
+    courbes = []
+    for i, (mes, typo, histo) in enumerate(groupes(s)):
+        print(nom)
+        print(typo)
+        print(histo)
+
+        title = style.NOMS[nom] + ' - ' + typo
+        df = pd.DataFrame(compresse[:, i], index = index,
+                          columns = [title]).reindex(groupes_stats[i][a].index)
+        courbes.append((typo, df))
+
+    # Statistiques
+    if s['stat'] == True:
+        print('moyenne\n', df.mean(), '\n')
+        print('max\n', df.max(), '\n')
+        print('min\n', df.min())
+    return courbes
+
+
+def trace(s, courbes):
+    """Rendu de la figure (tracés, seuils, légende) et sauvegarde"""
+    style.init_mpl(s['size'])
+    fig, ax = style.new_fig(s['size'])
+    panneau(ax, s, courbes)
+
+    # Cloture
+    with chrono.etape('sauvegarde'):
+        sortie.sauve(fig, s['figname'], s['SORTIES'])
+    return s['figname']
+
+
+def trace_planche(s, courbes):
+    """Rendu de la planche : un panneau par polluant (courbes : une liste
+    par panneau, voir calcule), une seule figure rendue et sauvegardée"""
+    specs = panneaux(s)
+    lignes = (len(specs) + s['colonnes'] - 1) // s['colonnes']
+    style.init_mpl(s['size'])
+    fig, axes = style.new_planche(s['size'], lignes, s['colonnes'], len(specs))
+    for ax, p, c in zip(axes, specs, courbes):
+        panneau(ax, p, c)
+
+    # Cloture
+    with chrono.etape('sauvegarde'):
+        sortie.sauve(fig, s['figname'], s['SORTIES'])
+    return s['figname']
+
+
+def panneau(ax, s, courbes):
+    """Tracés, échelle, seuils et légende d'un polluant sur ax"""
+    size = s['size']
+    nom  = KEY[s['polluant']].get_nom()
+    fig  = ax.figure
+    tmp  = Collecteur()   # statistiques pour le max de l'échelle
+
+    # Plot
+    with chrono.etape('trace') as e:
+        e.lignes = 0
+        for typo, df in courbes:
+            if not len(df.index):   # figure antérieure à l'historique de la typologie
+                continue
+            tmp.ajoute(df)
+            e.lignes += len(df.index)
+            df.asfreq('A').plot(ax = ax,
+                                linestyle       = '-',
+                                linewidth       = style.LINEWIDTH,
+                                marker          = 'o',
+                                markeredgewidth = 0,
+                                color           = COULEURS[typo],
+                                markersize      = s['MARKERSIZE'],
+                                clip_on         = False)
+
+    #Echelle
+    maxi = s['maxi']
+    if maxi == None:
+        maxi = style.echelle(tmp.max, PALIERS)
+    ax.set_ylim(ymin = 0, ymax = maxi)
+
+    unit = style.unite(nom)
+
+    # Seuils
+    with chrono.etape('seuils'):
+        seuils.trace(ax, nom, seuils.actifs(nom,
+                                            valeur_lim = s['Valeur_lim'] == True,
+                                            obj_qual   = s['Obj_qual'] == True,
+                                            oms        = s['Oms'] == True),
+                     maxi, unit, SEUILS_ANNUELS)
+
+    # Taille axes, unité, grille, légende
+    with chrono.etape('legende'):
+        style.finalise(fig, ax, size, unit, s['COL'], legende = (-0.075, 1.11, 1., .10))
@@ -0,0 +1,4 @@
+# -*- coding: UTF-8 -*-
+#Nom :  : tests
+#Description    : Tests des calculs de pyair_fig (python -m unittest discover -s tests -t .)
+#Copyright  : 2015, LIMAIR
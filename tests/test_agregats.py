@@ -0,0 +1,99 @@
+# -*- coding: UTF-8 -*-
+#Nom :  : test_agregats.py
+#Description    : Agrégats vectorisés comparés aux calculs pandas (rolling, resample, critère des 75 %)
+#Copyright  : 2015, LIMAIR
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from pyair_fig import agregats
+
+TOLERANCE = 1e-9
+
+
+def mesures(debut='2015-01-30 07:00', fin='2015-04-02 16:00', graine=1):
+    """Trois mesures horaires, jours incomplets en début et fin de période :
+    lacunes isolées, panne de 30 h, journée à 18 valeurs sur 24 (limite)
+    et mesure presque vide"""
+    rs = np.random.RandomState(graine)
+    index = pd.date_range(debut, fin, freq='H')
+    valeurs = 50 + 30 * np.sin(np.arange(len(index)) * 2 * np.pi / 24)[:, np.newaxis] \
+        + rs.normal(0, 8, (len(index), 3))
+    valeurs[rs.random_sample(valeurs.shape) < 0.08] = np.nan
+    valeurs[300:330, 0] = np.nan
+    jour = index.get_loc(pd.Timestamp('2015-02-20'))
+    valeurs[jour:jour + 24, 1] = 40.
+    valeurs[jour + 3:jour + 9, 1] = np.nan
+    valeurs[rs.random_sample(len(index)) < 0.7, 2] = np.nan
+    return pd.DataFrame(valeurs, index=index, columns=['A', 'B', 'C'])
+
+
+def moyenne_75(df, regle):
+    """Moyenne par période regle, NaN sous 75 % des heures du calendrier"""
+    r = df.resample(regle)
+    moyennes, comptes = r.mean(), r.count()
+    heures = pd.Series([p.to_timestamp(how='e').days_in_month * 24 if regle == 'M' else 24
+                        for p in moyennes.index.to_period(regle)], index=moyennes.index)
+    minimum = np.ceil(0.75 * heures - 1e-9)
+    return moyennes.where(comptes.ge(minimum, axis=0))
+
+
+class TestAgregats(unittest.TestCase):
+
+    def assertProches(self, obtenu, attendu):
+        self.assertEqual(len(obtenu.index), len(attendu.index))
+        self.assertTrue((obtenu.index == attendu.index).all())
+        np.testing.assert_allclose(np.asarray(obtenu.values, dtype=np.float64),
+                                   np.asarray(attendu.values, dtype=np.float64),
+                                   rtol=0, atol=TOLERANCE, equal_nan=True)
+
+    def test_glissante(self):
+        df = mesures()
+        valeurs, index = agregats.grille(df, 'H')
+        moyennes, comptes = agregats.glissante(valeurs, 8, 0.75)
+        attendu = df.rolling(8, min_periods=6).mean()
+        self.assertProches(pd.DataFrame(moyennes, index=index, columns=df.columns), attendu)
+        np.testing.assert_array_equal(comptes, df.rolling(8, min_periods=0).count().values)
+
+    def test_max_journalier_glissante(self):
+        # moyenne 8 h (6 valeurs sur 8), puis max journalier (18 moyennes sur 24)
+        df = mesures()
+        glissante = df.rolling(8, min_periods=6).mean()
+        r = glissante.resample('D')
+        attendu = r.max().where(r.count() >= 18)
+
+        obtenu, comptes = agregats.agrege(df, 'H', sur=8, max_journalier=True)
+        self.assertProches(obtenu, attendu)
+        np.testing.assert_array_equal(comptes.values, r.count().values)
+        # jours incomplets de début et de fin : moins de 18 heures
+        self.assertTrue(obtenu.iloc[[0, -1]].isnull().values.all())
+
+    def test_limite_18_sur_24(self):
+        df = mesures()
+        valeurs, index = agregats.grille(df[['B']], 'H')
+        res, comptes, dates = agregats.par_periode(valeurs, index, 'D', 'mean', 0.75)
+        jour = dates.get_loc(pd.Timestamp('2015-02-20'))
+        self.assertEqual(comptes[jour, 0], 18)
+        self.assertAlmostEqual(res[jour, 0], 40.)
+        valeurs[index.get_loc(pd.Timestamp('2015-02-20 12:00')), 0] = np.nan
+        res, comptes, _ = agregats.par_periode(valeurs, index, 'D', 'mean', 0.75)
+        self.assertEqual(comptes[jour, 0], 17)
+        self.assertTrue(np.isnan(res[jour, 0]))
+
+    def test_moyennes_journalieres_et_mensuelles(self):
+        df = mesures()
+        valeurs, index = agregats.grille(df, 'H')
+        for regle in ('D', 'M'):
+            res, _, dates = agregats.par_periode(valeurs, index, regle, 'mean', 0.75)
+            self.assertProches(pd.DataFrame(res, index=dates, columns=df.columns),
+                               moyenne_75(df, regle))
+
+    def test_agrege_frequence(self):
+        df = mesures()
+        self.assertProches(agregats.agrege(df, 'H', frequence='M')[0], moyenne_75(df, 'M'))
+
+
+if __name__ == '__main__':
+    unittest.main()
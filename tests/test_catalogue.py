@@ -0,0 +1,62 @@
+# -*- coding: UTF-8 -*-
+#Nom :  : test_catalogue.py
+#Description    : Catalogue des mesures : aller-retour CSV, modification du CSV prise en compte par typo
+#Copyright  : 2015, LIMAIR
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from pyair_fig import catalogue
+from pyair_fig import typo
+
+
+class TestCatalogue(unittest.TestCase):
+
+    def setUp(self):
+        self.dossier = tempfile.mkdtemp()
+        self.fichier = os.path.join(self.dossier, 'catalogue', 'mesures.csv')
+        catalogue.CATALOGUES.clear()
+
+    def tearDown(self):
+        catalogue.CATALOGUES.clear()
+        shutil.rmtree(self.dossier)
+
+    def test_depuis_typo(self):
+        c = catalogue.charge()
+        self.assertEqual(c.groupes('O3'), [(typo.O3_U, typo.urbain.get_nom(), None),
+                                           (typo.O3_P, typo.periurb.get_nom(), None),
+                                           (typo.O3_R, typo.rural.get_nom(), 2003)])
+        self.assertEqual([c.pmnc(m) for m in typo.PM10C_U], typo.PM10NC_U)
+        self.assertIsNone(c.pmnc('NO2_PRE'))
+
+    def test_aller_retour_csv(self):
+        ecrit = catalogue.charge(self.fichier)
+        self.assertTrue(os.path.exists(self.fichier))
+        lu = catalogue.Catalogue.lit(self.fichier)
+        for p in typo.list_polluants:
+            self.assertEqual(lu.groupes(p.get_nom()), ecrit.groupes(p.get_nom()))
+        for mes in ecrit.table['MESURE']:
+            self.assertEqual(lu.pmnc(mes), ecrit.pmnc(mes))
+        self.assertEqual(list(lu.table.columns), catalogue.COLONNES)
+
+    def test_station_ajoutee_au_csv(self):
+        catalogue.charge(self.fichier)
+        with io.open(self.fichier, 'a', encoding='utf-8') as f:
+            f.write(u'O3_VIC,VICTOR,O3,Station(s) trafic(s),2014,\n'
+                    u'O3_AIN,AINE,O3,Station(s) urbaine(s),,\n')
+        catalogue.CATALOGUES.clear()   # exécution suivante
+
+        s = typo.spec(polluant='O3', catalogue=self.fichier)
+        groupes = typo.groupes(s)
+        self.assertEqual(groupes[0], (typo.O3_U + ['O3_AIN'], typo.urbain.get_nom(), 1999))
+        self.assertEqual(groupes[-1], (['O3_VIC'], u'Station(s) trafic(s)', 2014))
+        self.assertIn((['O3_VIC'], '2014-01-01', '2015-12-31'), [g[0] for g in typo.segments(s)])
+        # figure sans catalogue : listes de typo.py
+        self.assertEqual(len(typo.groupes(typo.spec(polluant='O3'))), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+# -*- coding: UTF-8 -*-
+#Nom :  : test_chrono.py
+#Description    : Relevés par étape : pic de mémoire propre à chaque étape, variation de mémoire résidente
+#Copyright  : 2015, LIMAIR
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from pyair_fig import chrono
+
+MO = 1024 * 1024
+
+
+class TestChrono(unittest.TestCase):
+
+    def setUp(self):
+        self.dossier = tempfile.mkdtemp()
+        self.fichier = os.path.join(self.dossier, 'chrono.jsonl')
+        chrono.active(self.fichier)
+
+    def tearDown(self):
+        chrono.desactive()
+        shutil.rmtree(self.dossier)
+
+    def releves(self):
+        with open(self.fichier) as f:
+            return dict((r['etape'], r) for r in map(json.loads, f))
+
+    def test_pic_par_etape(self):
+        if chrono.PIC is None:
+            self.skipTest("pic de mémoire non mesurable ici")
+        with chrono.figure('essai'):
+            with chrono.etape('grosse'):
+                a = np.ones(40 * MO // 8)
+                del a
+            with chrono.etape('petite'):
+                b = np.ones(1000)
+        r = self.releves()
+        self.assertGreaterEqual(r['grosse']['memoire_max'], 40 * MO)
+        # le pic de l'étape précédente n'est pas reporté sur la suivante
+        self.assertLess(r['petite']['memoire_max'], r['grosse']['memoire_max'] - 20 * MO)
+        # mais l'est sur la figure englobante
+        self.assertGreaterEqual(r['figure']['memoire_max'], r['grosse']['memoire_max'])
+        self.assertEqual(r['petite']['figure'], 'essai')
+
+    def test_variation_rss(self):
+        if chrono.rss() is None:
+            self.skipTest("mémoire résidente non mesurable ici")
+        garde = []
+        with chrono.etape('alloue'):
+            garde.append(np.ones(40 * MO // 8))
+        self.assertGreaterEqual(self.releves()['alloue']['rss_variation'], 30 * MO)
+
+    def test_prometheus_sans_memoire(self):
+        releves = [{'figure': 'f', 'etape': 'trace', 'duree': 1., 'lignes': 3, 'memoire_max': None}]
+        self.assertNotIn('memoire_octets', chrono.prometheus(releves))
+        releves[0]['memoire_max'] = 10
+        self.assertIn('pyair_fig_etape_memoire_octets{figure="f",etape="trace"} 10',
+                      chrono.prometheus(releves))
+
+
+if __name__ == '__main__':
+    unittest.main()
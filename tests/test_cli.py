@@ -0,0 +1,68 @@
+# -*- coding: UTF-8 -*-
+#Nom :  : test_cli.py
+#Description    : Ligne de commande : erreurs de paramètres lisibles, --dry-run
+#Copyright  : 2015, LIMAIR
+
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+from pyair_fig import cli
+
+
+class TestCli(unittest.TestCase):
+
+    def lance(self, *argv):
+        """(code de retour, sortie, erreurs) de python -m pyair_fig argv"""
+        sortie, erreurs = sys.stdout, sys.stderr
+        sys.stdout, sys.stderr = StringIO(), StringIO()
+        try:
+            code = cli.main(list(argv))
+            return code, sys.stdout.getvalue(), sys.stderr.getvalue()
+        finally:
+            sys.stdout, sys.stderr = sortie, erreurs
+
+    def test_parametre_inconnu(self):
+        for t in ('ma', 'typo', 'mf'):
+            code, _, erreurs = self.lance(t, '--set', 'foo=1', '--dry-run')
+            self.assertEqual(code, 2)
+            self.assertEqual(erreurs, "Erreur : Paramètre(s) inconnu(s) : foo\n")
+
+    def test_parametre_inconnu_fichier_de_travaux(self):
+        # clés JSON en unicode sous Python 2
+        dossier = tempfile.mkdtemp()
+        try:
+            chemin = os.path.join(dossier, 'travaux.json')
+            with io.open(chemin, 'w', encoding='utf-8') as f:
+                f.write(u'[{"type": "typo", "polluant": "O3", "durée": 3}]')
+            code, _, erreurs = self.lance(chemin, '--dry-run')
+        finally:
+            shutil.rmtree(dossier)
+        self.assertEqual(code, 2)
+        self.assertEqual(erreurs, "Erreur : Paramètre(s) inconnu(s) : durée\n")
+
+    def test_valeurs_inconnues(self):
+        self.assertEqual(self.lance('typo', '--set', 'polluant=XX', '--dry-run')[2],
+                         "Erreur : Polluant inconnu : XX\n")
+        self.assertEqual(self.lance('mf', '--set', 'parametres=["T","ZZ"]', '--dry-run')[2],
+                         "Erreur : Paramètre météo inconnu : ZZ\n")
+        code, _, erreurs = self.lance('ma', '--polluant', 'XX:XX_PRE', '--dry-run')
+        self.assertEqual(code, 2)
+        self.assertTrue(erreurs.startswith("Erreur : Famille de polluant inconnue : XX ("))
+
+    def test_dry_run(self):
+        code, sortie, _ = self.lance('typo', '--set', 'polluant=PM10', '--dry-run')
+        self.assertEqual(code, 0)
+        self.assertEqual(sortie.split(), ['typo', 'PM10-histo'])
+
+
+if __name__ == '__main__':
+    unittest.main()
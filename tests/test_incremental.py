@@ -0,0 +1,116 @@
+# -*- coding: UTF-8 -*-
+#Nom :  : test_incremental.py
+#Description    : Agrégats incrémentaux comparés au calcul en une fois (agregats.agrege)
+#Copyright  : 2015, LIMAIR
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from pyair_fig import agregats
+from pyair_fig import incremental
+from pyair_fig import style
+
+
+def serie(debut='2015-06-28', fin='2015-07-05 23:00', lacunes=0.1, graine=0):
+    """Deux mesures horaires avec lacunes isolées et une panne d'une demi-journée"""
+    rs = np.random.RandomState(graine)
+    index = pd.date_range(debut, fin, freq='H')
+    valeurs = 80 + 40 * np.sin(np.arange(len(index)) * 2 * np.pi / 24)[:, np.newaxis] \
+        + rs.normal(0, 10, (len(index), 2))
+    valeurs[rs.random_sample(valeurs.shape) < lacunes] = np.nan
+    valeurs[60:72, 1] = np.nan
+    return pd.DataFrame(valeurs, index=index, columns=['O3_A', 'O3_B'])
+
+
+def par_morceaux(df, tailles, **chaine):
+    """Incremental alimenté par morceaux de tailles lignes (le reste ensuite)"""
+    etat = incremental.Incremental(df.index[0], 'H', **chaine)
+    debut = 0
+    for taille in list(tailles) + [len(df.index)]:
+        etat.ajoute(df.iloc[debut:debut + taille])
+        debut += taille
+    return etat.resultat()
+
+
+class FauxXAIR(object):
+    """get_mesures sur une série en mémoire ; garde les débuts demandés"""
+
+    def __init__(self, df):
+        self.df = df
+        self.debuts = []
+
+    def get_mesures(self, mes, debut=None, fin=None, freq='H'):
+        self.debuts.append(debut)
+        return self.df[debut:fin + ' 23:00']
+
+
+class TestIncremental(unittest.TestCase):
+
+    def compare(self, df, tailles, **chaine):
+        attendu = agregats.agrege(df, 'H', **chaine)[0]
+        obtenu = par_morceaux(df, tailles, **chaine)
+        self.assertTrue(obtenu.index.equals(attendu.index))
+        np.testing.assert_allclose(obtenu.values, attendu.values, rtol=1e-12, equal_nan=True)
+
+    def test_max_journalier_glissante(self):
+        # premier morceau plus court que la fenêtre de 8 h
+        df = serie()
+        self.compare(df, [6], sur=8, max_journalier=True)
+        self.compare(df, [1, 2, 3, 30, 5, 100], sur=8, max_journalier=True)
+
+    def test_morceaux_horaires(self):
+        df = serie()
+        self.compare(df, [1] * 30, sur=8, max_journalier=True)
+        self.compare(df, [3, 3, 3, 3], sur=8)
+
+    def test_moyennes(self):
+        df = serie()
+        self.compare(df, [6, 20, 7], frequence='D')
+        self.compare(df, [50], max_annuel=True)
+
+    def test_reprise_apres_pickle(self):
+        # l'état conservé entre deux exécutions doit donner le même résultat
+        df = serie()
+        chaine = dict(sur=8, max_journalier=True)
+        etat = incremental.Incremental(df.index[0], 'H', **chaine)
+        etat.ajoute(df.iloc[:6])
+        etat = pd.read_pickle(self.pickle(etat))
+        etat.ajoute(df.iloc[6:])
+        attendu = agregats.agrege(df, 'H', **chaine)[0]
+        np.testing.assert_allclose(etat.resultat().values, attendu.values, equal_nan=True)
+        self.assertTrue(np.isfinite(etat.resultat().loc['2015-07-01']).any())
+
+    def test_etat_independant_du_style(self):
+        # un changement de rendu ne doit pas faire repartir l'état de zéro
+        dossier = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, dossier, True)
+        df = serie()
+        xr = FauxXAIR(df)
+        chaine = dict(sur=8, max_journalier=True, dossier=dossier)
+        incremental.agrege(xr, list(df.columns), '2015-06-28', '2015-07-02', **chaine)
+        dpi = style.DPI
+        style.DPI = dpi * 2
+        try:
+            res = incremental.agrege(xr, list(df.columns), '2015-06-28', '2015-07-05', **chaine)
+        finally:
+            style.DPI = dpi
+        self.assertEqual(len(os.listdir(dossier)), 1)
+        self.assertEqual(xr.debuts, ['2015-06-28', '2015-07-03'])
+        attendu = agregats.agrege(df, 'H', sur=8, max_journalier=True)[0]
+        np.testing.assert_allclose(res.values, attendu.values, equal_nan=True)
+
+    def pickle(self, etat):
+        dossier = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, dossier, True)
+        chemin = os.path.join(dossier, 'etat.pkl')
+        pd.to_pickle(etat, chemin)
+        return chemin
+
+
+if __name__ == '__main__':
+    unittest.main()
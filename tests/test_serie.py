@@ -0,0 +1,74 @@
+# -*- coding: UTF-8 -*-
+#Nom :  : test_serie.py
+#Description    : Séries compactes float32 : partage mémoire, plancher en place, masque, agrégats
+#Copyright  : 2015, LIMAIR
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from pyair_fig import agregats
+from pyair_fig.serie import Serie, DTYPE
+
+
+def mesures(graine=3):
+    """Deux mesures horaires (valeurs négatives, lacunes, heures absentes de l'index)"""
+    rs = np.random.RandomState(graine)
+    index = pd.date_range('2015-01-01 05:00', '2015-03-10 18:00', freq='H')
+    valeurs = rs.normal(40, 25, (len(index), 2))
+    valeurs[rs.random_sample(valeurs.shape) < 0.1] = np.nan
+    df = pd.DataFrame(valeurs, index=index, columns=['A', 'B'])
+    return df.drop(index[100:130])
+
+
+class TestSerie(unittest.TestCase):
+
+    def test_frame_partage_les_valeurs(self):
+        serie = Serie.depuis(mesures(), 'H')
+        df = serie.frame()
+        self.assertEqual(df.values.dtype, DTYPE)
+        self.assertTrue(np.shares_memory(df.values, serie.valeurs))
+        serie.valeurs[10, 1] = 1234.
+        self.assertEqual(df.iloc[10, 1], 1234.)
+
+    def test_plancher_en_place(self):
+        serie = Serie.depuis(mesures(), 'H')
+        valeurs = serie.valeurs
+        self.assertTrue((valeurs[serie.valides] < 0).any())
+        self.assertIs(serie.plancher(0), serie)
+        self.assertIs(serie.valeurs, valeurs)
+        self.assertTrue((valeurs[serie.valides] >= 0).all())
+        fenetre = serie.fenetre('2015-02-01', '2015-02-28 23:00')
+        self.assertTrue(np.shares_memory(fenetre.valeurs, serie.valeurs))
+        fenetre.plancher(10)   # vue : modifie la série
+        dans = (serie.index >= '2015-02-01') & (serie.index < '2015-03-01')
+        self.assertTrue((serie.valeurs[dans][serie.valides[dans]] >= 10).all())
+        self.assertTrue((serie.valeurs[~dans][serie.valides[~dans]] < 10).any())
+
+    def test_valeurs_masquees_en_nan(self):
+        df = mesures()
+        serie = Serie.depuis(df, 'H')
+        attendu = df.reindex(serie.index)
+        for j in range(2):
+            np.testing.assert_array_equal(np.isnan(serie.colonne(j)), attendu.iloc[:, j].isnull().values)
+        self.assertTrue((serie.frame().isnull().values == attendu.isnull().values).all())
+        # heures absentes de l'index de df : invalides
+        self.assertFalse(serie.valides[100:130].any())
+
+    def test_agrege_comme_float64(self):
+        df = mesures()
+        serie = Serie.depuis(df, 'H')
+        for params in ({'sur': 8, 'max_journalier': True},
+                       {'frequence': 'D'},
+                       {'frequence': 'D', 'sur': 3},
+                       {'sur': 8, 'max_journalier': True, 'max_annuel': True}):
+            attendu = agregats.agrege(df, 'H', **params)[0]
+            obtenu = serie.agrege('H', **params).frame()
+            self.assertTrue((obtenu.index == attendu.index).all())
+            np.testing.assert_allclose(obtenu.values.astype(np.float64), attendu.values,
+                                       rtol=1e-5, atol=1e-4, equal_nan=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+# -*- coding: UTF-8 -*-
+#Nom :  : test_stations.py
+#Description    : Index des mesures : listes filtrées réinterrogées comme l'index complet
+#Copyright  : 2015, LIMAIR
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import pandas as pd
+
+from pyair_fig import stations
+
+
+class FauxXAIR(object):
+    """liste_mesures d'un parc modifiable ; compte les requêtes"""
+
+    def __init__(self):
+        self.parc = [('O3_PRE', 'PRESID', 'OZONE'), ('NO2_PRE', 'PRESID', 'NO2')]
+        self.requetes = 0
+
+    def liste_mesures(self, reseau=None):
+        self.requetes += 1
+        df = pd.DataFrame(self.parc, columns=['MESURE', 'STATION', 'RESEAU'])
+        return df if reseau is None else df[df['RESEAU'] == reseau]
+
+
+class TestIndexMesures(unittest.TestCase):
+
+    def setUp(self):
+        self.dossier = tempfile.mkdtemp()
+        self.fichier = os.path.join(self.dossier, 'Cache', 'mesures.csv')
+        self.xr = FauxXAIR()
+        stations.IndexMesures(self.xr, self.fichier).liste(reseau='OZONE')   # exécution précédente
+        self.xr.parc.append(('O3_GAR', 'GARROS', 'OZONE'))                   # nouvelle station
+        self.xr.requetes = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.dossier)
+
+    def test_liste_conservee(self):
+        index = stations.IndexMesures(self.xr, self.fichier)
+        self.assertEqual(list(index.liste(reseau='OZONE')), ['O3_PRE'])
+        self.assertEqual(self.xr.requetes, 0)
+
+    def test_liste_perimee(self):
+        chemin = os.path.join(self.dossier, 'Cache', 'mesures-reseau-OZONE.csv')
+        ancien = time.time() - (stations.EXPIRATION + 1) * 86400
+        os.utime(chemin, (ancien, ancien))
+        index = stations.IndexMesures(self.xr, self.fichier)
+        self.assertEqual(list(index.liste(reseau='OZONE')), ['O3_PRE', 'O3_GAR'])
+        self.assertEqual(list(index.liste(reseau='OZONE')), ['O3_PRE', 'O3_GAR'])
+        self.assertEqual(self.xr.requetes, 1)   # une fois par exécution
+
+    def test_nouvelle_station_dans_l_index(self):
+        index = stations.IndexMesures(self.xr, self.fichier)
+        self.assertEqual(list(index.liste(reseau='OZONE')), ['O3_PRE'])
+        # mesure inconnue : index complet relu, listes filtrées aussi
+        self.assertEqual(index.station('O3_GAR'), 'GARROS')
+        self.assertEqual(list(index.liste(reseau='OZONE')), ['O3_PRE', 'O3_GAR'])
+        self.assertEqual(self.xr.requetes, 2)
+        # exécution suivante : listes à jour relues dans les fichiers
+        suivant = stations.IndexMesures(self.xr, self.fichier)
+        self.assertEqual(list(suivant.liste(reseau='OZONE')), ['O3_PRE', 'O3_GAR'])
+        self.assertEqual(suivant.station('O3_GAR'), 'GARROS')
+        self.assertEqual(self.xr.requetes, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+# -*- coding: UTF-8 -*-
+#Nom :  : test_stock.py
+#Description    : Stock d'agrégats : période sans année calculée
+#Copyright  : 2015, LIMAIR
+
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from pyair_fig.stock import StockAgregats
+
+
+class XAIR(object):
+    """get_mesures : valeur horaire constante par mesure"""
+
+    def get_mesures(self, mes, debut=None, fin=None, freq='H', **kwargs):
+        mesures = [mes] if isinstance(mes, str) else list(mes)
+        index = pd.date_range(debut, pd.Timestamp(fin) + pd.Timedelta(hours=23), freq=freq)
+        return pd.DataFrame(dict((m, np.full(len(index), 10. + i)) for i, m in enumerate(mesures)),
+                            index=index, columns=mesures)
+
+
+class TestStock(unittest.TestCase):
+
+    def setUp(self):
+        self.dossier = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dossier, True)
+        self.stock = StockAgregats(XAIR(), self.dossier)
+
+    def test_moyennes_annuelles(self):
+        df = self.stock.get_agregats(['A', 'B'], '2013-01-01', '2014-12-31')
+        self.assertEqual(list(df.columns), ['A', 'B'])
+        np.testing.assert_allclose(df.values, [[10., 11.], [10., 11.]])
+
+    def test_periode_anterieure_a_l_historique(self):
+        # ANNEE antérieure au début de l'historique : courbe vide, pas d'erreur
+        df = self.stock.get_agregats('A', '2013-01-01', '2012-12-31')
+        self.assertEqual(len(df.index), 0)
+        self.assertEqual(list(df.columns), ['A'])
+        self.assertIsInstance(df.index, pd.DatetimeIndex)
+
+        # même cas, fichier du stock déjà présent
+        self.stock.get_agregats('A', '2013-01-01', '2013-12-31')
+        res = self.stock.extrait([('A', '2013-01-01', '2012-12-31', 'H')], 'A',
+                                 ['moyenne', 'comptes'])[0]
+        self.assertEqual(len(res['moyenne'].index), 0)
+        self.assertEqual(res['comptes'].dtypes['A'], np.float64)
+
+
+if __name__ == '__main__':
+    unittest.main()